@@ -0,0 +1,71 @@
+import numpy as np
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def histogram(values, nbins=30):
+    # bin counts over the finite values; edges has nbins + 1 entries
+    values = _finite(values)
+    if len(values) == 0:
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(values, bins=nbins)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def box_summary(values, max_outliers=200, seed=0):
+    # Tukey box: quartiles, whiskers at the furthest points within 1.5 IQR and
+    # a uniform sample of at most max_outliers points beyond them
+    values = _finite(values)
+    if len(values) == 0:
+        return None
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+
+    if len(outliers) > max_outliers:
+        outliers = np.random.default_rng(seed).choice(outliers, max_outliers, replace=False)
+
+    return {
+        "n": int(len(values)),
+        "mean": float(values.mean()),
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lowerfence": float(inside.min()),
+        "upperfence": float(inside.max()),
+        "outliers": np.sort(outliers).tolist(),
+        "n_outliers": int(len(values) - len(inside))
+    }
+
+
+def grouped_box_summary(values, groups, max_outliers=200, seed=0):
+    values = np.asarray(values, dtype=float)
+    groups = np.asarray(groups)
+    return {
+        key.item() if hasattr(key, "item") else key:
+            box_summary(values[groups == key], max_outliers, seed)
+        for key in np.unique(groups)
+    }
+
+
+def top_k(values, k):
+    # positions of the k largest finite values, highest first, in O(n + k log k):
+    # a partition finds the k-th value, only the k winners are sorted, and
+    # ties go to the earlier row, so the ranking is the same on every call
+    values = np.asarray(values, dtype=float)
+    candidates = np.flatnonzero(np.isfinite(values))
+    k = min(int(k), len(candidates))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    scores = values[candidates]
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = candidates[scores > kth]
+    ties = candidates[scores == kth][:k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.lexsort((chosen, -values[chosen]))]
@@ -0,0 +1,147 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("CHURN_API_URL", "http://127.0.0.1:5000")
+CONNECT_TIMEOUT = float(os.environ.get("CHURN_API_CONNECT_TIMEOUT", 3.0))
+READ_TIMEOUT = float(os.environ.get("CHURN_API_TIMEOUT", 30.0))
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiUnavailable(ApiError):
+    pass
+
+
+class ChurnClient:
+    # One keep-alive connection pool shared by every caller (it is thread
+    # safe). Connection errors and 502/503/504 are retried with exponential
+    # backoff; scoring is side-effect free, so retrying POSTs is safe.
+
+    def __init__(self, base_url=API_URL, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=3, backoff=0.2, pool_size=16):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        try:
+            res = self.session.request(method, f"{self.base_url}{path}",
+                                       timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise ApiUnavailable(f"{self.base_url} is unreachable ({e})") from e
+
+        try:
+            body = res.json()
+        except ValueError:
+            body = {"error": res.text[:200]}
+        if res.status_code >= 400:
+            raise ApiError(body.get("error", f"HTTP {res.status_code}"), res.status_code)
+        return body
+
+    def ready(self):
+        try:
+            return self._request("GET", "/ready").get("status") == "ready"
+        except ApiError:
+            return False
+
+    @staticmethod
+    def _params(model_version, explain):
+        params = {}
+        if model_version:
+            params["model_version"] = model_version
+        if explain:
+            params["explain"] = int(explain)
+        return params or None
+
+    def predict(self, record, model_version=None, explain=0):
+        # explain=k adds the top-k risk drivers under "explanation"
+        return self._request("POST", "/predict", json=record,
+                             params=self._params(model_version, explain))
+
+    def predict_batch(self, records, model_version=None, explain=0):
+        # records: list of dicts or a columnar {"column": [values, ...]} dict
+        params = self._params(model_version, explain)
+        return self._request(
+            "POST", "/predict/batch", params=params,
+            data=json.dumps(records), headers={"Content-Type": "application/json"}
+        )
+
+    def whatif(self, customer, grid, model_version=None):
+        # grid: {feature: [values, ...]}; every combination is scored for this customer
+        return self._request("POST", "/predict/whatif", json={"customer": customer, "grid": grid},
+                             params=self._params(model_version, 0))
+
+    def decision(self, model_version=None):
+        # operating threshold and risk bands of the serving (or pinned) version
+        return self._request("GET", "/decision", params=self._params(model_version, 0))
+
+    def drift(self, model_version=None):
+        # live feature / score drift against the model's training profile
+        return self._request("GET", "/drift", params=self._params(model_version, 0))
+
+    def _fan_out(self, fn, items, max_workers):
+        # ordered results with at most 2 * max_workers requests in flight
+        max_workers = max(1, min(max_workers, self.pool_size))
+        pending = deque()
+        with ThreadPoolExecutor(max_workers) as pool:
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                while len(pending) >= 2 * max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def predict_many(self, records, max_workers=8):
+        # one /predict per record, concurrently; a failed record yields {"error": ...}
+        def one(record):
+            try:
+                return self.predict(record)
+            except ApiError as e:
+                return {"error": str(e)}
+
+        return list(self._fan_out(one, records, max_workers))
+
+    def score_chunks(self, df, chunk_size=5_000, max_workers=4):
+        # Same contract as scoring.score_chunks, but over /predict/batch:
+        # yields (start, stop, predictions, probabilities) in order, with
+        # None for rows the API rejected.
+        from schema import FEATURE_COLUMNS
+
+        columns = [c for c in FEATURE_COLUMNS if c in df.columns]
+        bounds = [(start, min(start + chunk_size, len(df)))
+                  for start in range(0, len(df), chunk_size)]
+
+        def one(bound):
+            start, stop = bound
+            chunk = df.iloc[start:stop]
+            body = {c: chunk[c].astype(object).where(chunk[c].notna(), None).tolist()
+                    for c in columns}
+            result = self.predict_batch(body)
+            return start, stop, result["predictions"], result["probabilities"]
+
+        yield from self._fan_out(one, bounds, max_workers)
+
+    def close(self):
+        self.session.close()
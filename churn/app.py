@@ -1,39 +1,384 @@
-from flask import Flask, request, jsonify
-import joblib
-import pandas as pd
+import os
 
-model = joblib.load("churn_model.pkl")
+from flask import Flask, Response, g, request, jsonify
+from werkzeug.exceptions import BadRequest
+
+import metrics
+
+from batcher import MicroBatcher
+from cache import PredictionCache, cache_key
+from registry import ModelRegistry, UnknownModelVersion, promote
+from schema import validate_record
+from threshold import decision_of, risk_band
+
+# pandas, sklearn and scoring.py are imported on first use: with CHURN_FAST_PATH=1
+# and a <model>.fast.json next to the model, single-row /predict never needs them
+
+MODEL_PATH = os.environ.get("CHURN_MODEL_PATH", "churn_model.pkl")
+
+# ---- versioned model directory (see registry.py); unset serves MODEL_PATH ----
+MODEL_DIR = os.environ.get("CHURN_MODEL_DIR") or None
+PINNED_VERSIONS = os.environ.get("CHURN_MODEL_VERSIONS", "").split(",")
+MODEL_CHECK_S = float(os.environ.get("CHURN_MODEL_CHECK_S", 2.0))
+DRIFT_WINDOW = int(os.environ.get("CHURN_DRIFT_WINDOW", 1000))
+ADMIN_TOKEN = os.environ.get("CHURN_ADMIN_TOKEN")
+
+# ---- requests slower than this are logged with their payload (off when unset) ----
+SLOW_REQUEST_S = (float(os.environ["CHURN_SLOW_REQUEST_MS"]) / 1000
+                  if os.environ.get("CHURN_SLOW_REQUEST_MS") else None)
+TIMED_ENDPOINTS = {"predict", "predict_batch", "predict_whatif"}
+
+# ---- prediction cache keyed on the canonical feature tuple ----
+cache = None
+if int(os.environ.get("CHURN_CACHE_SIZE", 10_000)) > 0:
+    cache = PredictionCache(
+        maxsize=int(os.environ.get("CHURN_CACHE_SIZE", 10_000)),
+        ttl=float(os.environ.get("CHURN_CACHE_TTL", 300.0))
+    )
+
+registry = ModelRegistry(
+    root=MODEL_DIR,
+    model_path=MODEL_PATH,
+    pinned=PINNED_VERSIONS,
+    fast_path=os.environ.get("CHURN_FAST_PATH") == "1",
+    check_s=MODEL_CHECK_S,
+    drift_window=DRIFT_WINDOW,
+    on_swap=cache.set_version if cache is not None else None
+)
+registry.load_initial()
+
+
+def explain_record(loaded, data, k, stage):
+    # top-k risk drivers need the full pipeline, so they bypass the cache and
+    # fast path; None when the model has no exact drivers (not linear)
+    import pandas as pd
+    from explain import explainer_for
+    from scoring import add_features
+
+    try:
+        explainer = explainer_for(loaded.model)
+    except ValueError:
+        return None
+    with stage("frame"):
+        df = pd.DataFrame([data])
+    with stage("features"):
+        df = add_features(df)
+    with stage("predict"):
+        pred, prob, idx, values = explainer.score(df, k)
+    return pred[0], prob[0], explainer.records(df, idx, values)[0]
+
+
+def score_records(df):
+    from scoring import add_features, score_frame
+    return score_frame(registry.current.model, add_features(df))
+
+
+# ---- optional micro-batching of concurrent /predict calls ----
+batcher = None
+if os.environ.get("CHURN_MICROBATCH") == "1":
+    batcher = MicroBatcher(
+        score_records,
+        window_ms=float(os.environ.get("CHURN_BATCH_WINDOW_MS", 2.0)),
+        max_batch=int(os.environ.get("CHURN_BATCH_MAX_SIZE", 64))
+    )
+
+def _cache_metrics():
+    if cache is None:
+        return []
+    st = cache.stats()
+    return [
+        ("churn_cache_hits_total", "counter", "Prediction cache hits.", st["hits"]),
+        ("churn_cache_misses_total", "counter", "Prediction cache misses.", st["misses"]),
+        ("churn_cache_evictions_total", "counter", "Prediction cache LRU evictions.", st["evictions"]),
+        ("churn_cache_entries", "gauge", "Prediction cache entries.", st["size"])
+    ]
+
+
+def _batcher_metrics():
+    if batcher is None:
+        return []
+    st = batcher.stats()
+    return [
+        ("churn_microbatch_batches_total", "counter", "Micro-batches scored.", st["batches"]),
+        ("churn_microbatch_requests_total", "counter", "Requests scored through the micro-batcher.", st["requests"])
+    ]
+
+
+def _registry_metrics():
+    st = registry.stats()
+    return [
+        ("churn_model_swaps_total", "counter", "Serving model version changes.", st["swaps"]),
+        ("churn_model_load_failures_total", "counter", "Model versions that failed to load.", st["load_failures"]),
+        ("churn_models_loaded", "gauge", "Model versions held in memory.", len(st["loaded"]))
+    ]
+
+
+def _drift_metrics():
+    loaded = registry.get()
+    if loaded is None or loaded.drift is None:
+        return []
+    report = loaded.drift.report()
+    return [
+        ("churn_drift_observations_total", "counter", "Rows seen by the drift monitor.", report["observations"]),
+        ("churn_drift_alerts", "gauge", "Features whose last window PSI crossed the alert threshold.", len(report["alerts"]))
+    ]
+
+
+metrics.add_collector(_registry_metrics)
+metrics.add_collector(_cache_metrics)
+metrics.add_collector(_batcher_metrics)
+metrics.add_collector(_drift_metrics)
 
 app = Flask(__name__)
 
+@app.before_request
+def start_timer():
+    registry.ensure_watcher()
+    if request.endpoint in TIMED_ENDPOINTS:
+        g.timer = metrics.RequestTimer(request.endpoint, SLOW_REQUEST_S)
+
+@app.after_request
+def record_metrics(response):
+    timer = g.pop("timer", None)
+    if timer is not None:
+        timer.finish(response.status_code, lambda: request.get_data(as_text=True))
+    return response
+
+def error_response(message, status, kind):
+    metrics.ERRORS.inc(request.endpoint, kind)
+    if status >= 500:
+        app.logger.exception("%s failed", request.endpoint)
+    return jsonify({"error": message}), status
+
+
 @app.route("/")
 def home():
     return "Churn Prediction API Running"
 
+@app.route("/ready")
+def ready():
+    if registry.current is None:
+        return jsonify({"status": "loading"}), 503
+    return jsonify({"status": "ready", "pid": os.getpid(), "model_version": registry.current.version})
+
 @app.route("/predict", methods=["POST"])
 def predict():
+    stage = g.timer.stage
     try:
-        data = request.get_json()
+        with stage("parse"):
+            data = request.get_json()
+        if not isinstance(data, dict):
+            return error_response("body must be a JSON object", 400, "invalid_input")
 
-        df = pd.DataFrame([data])
+        # pin one request to a loaded version (A/B, shadow); default is the serving one
+        requested = data.pop("model_version", None) or request.args.get("model_version")
+        loaded = registry.get(requested)
+        serving = loaded is registry.current
+        explain = request.args.get("explain", default=0, type=int)
+
+        # labels and bands come from the version's tuned decision (threshold.py)
+        decision = decision_of(loaded.meta)
+
+        # one validation for every scoring path (explain, fast path, micro-batcher,
+        # sklearn), so the mode a worker runs in never changes what is accepted
+        with stage("validate"):
+            record = validate_record(data)
+
+        explained = explain_record(loaded, record, explain, stage) if explain > 0 else None
+        if explained is not None:
+            _, prob, drivers = explained
+            prob = float(prob)
+            if loaded.drift is not None:
+                loaded.drift.observe(record, prob)
+            metrics.ROWS.inc("predict")
+            return jsonify({
+                "prediction": int(prob >= decision["threshold"]),
+                "probability": prob,
+                "risk_band": risk_band(prob, decision),
+                "model_version": loaded.version,
+                "explanation": drivers
+            })
 
-        # ---- prevent infinity ----
-        df["tenure"] = df["tenure"].clip(lower=1)
+        with stage("cache"):
+            # keyed on the validated record: an entry only ever answers inputs
+            # that every scoring path accepts and scores identically
+            key = cache_key(record) if cache is not None and serving else None
+            hit = cache.get(key) if key is not None else None
 
-        # ---- engineered features ----
-        df["charge_per_tenure"] = df["monthly_charge"] / (df["tenure"] + 1)
-        df["income_per_family"] = df["income_numeric"] / (df["tenure"] + 1)
+        if hit is not None:
+            pred, prob = hit
+        else:
+            if loaded.fast_scorer is not None:
+                with stage("predict"):
+                    pred, prob = loaded.fast_scorer.predict_one(record)
+            elif batcher is not None and serving:
+                with stage("predict"):
+                    pred, prob = batcher.predict(record)
+            else:
+                import pandas as pd
+                from scoring import add_features, score_frame
 
-        pred = model.predict(df)[0]
-        prob = model.predict_proba(df)[0][1]
+                with stage("frame"):
+                    df = pd.DataFrame([record])
+                with stage("features"):
+                    df = add_features(df)
+                preds, probs = score_frame(loaded.model, df, stage)
+                pred, prob = preds[0], probs[0]
 
-        return jsonify({
-            "prediction": int(pred),
-            "probability": float(prob)
-        })
+            if key is not None:
+                cache.put(key, (pred, prob), loaded.version)
+
+        prob = float(prob)
+        if loaded.drift is not None:
+            loaded.drift.observe(record, prob)
+        metrics.ROWS.inc("predict")
+        result = {
+            "prediction": int(prob >= decision["threshold"]),
+            "probability": prob,
+            "risk_band": risk_band(prob, decision),
+            "model_version": loaded.version
+        }
+        if explain > 0:
+            # asked for drivers, but the model cannot explain itself
+            result["explanation"] = None
+        return jsonify(result)
+
+    except UnknownModelVersion as e:
+        return error_response(e.args[0], 404, "unknown_version")
+
+    except BadRequest as e:
+        return error_response(e.description, 400, "parse")
+
+    except KeyError as e:
+        return error_response(f"missing field {e}", 400, "invalid_input")
+
+    except (TypeError, ValueError) as e:
+        return error_response(str(e), 400, "invalid_input")
+
+    except Exception as e:
+        return error_response(str(e), 500, "internal")
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    stage = g.timer.stage
+    try:
+        from scoring import score_batch
+
+        with stage("parse"):
+            body = request.get_json()
+        loaded = registry.get(request.args.get("model_version"))
+        result = score_batch(loaded.model, body, stage,
+                             explain=request.args.get("explain", default=0, type=int),
+                             monitor=loaded.drift, decision=decision_of(loaded.meta))
+        result["model_version"] = loaded.version
+
+        metrics.ROWS.inc("predict_batch", amount=result["scored"])
+        return jsonify(result)
+
+    except UnknownModelVersion as e:
+        return error_response(e.args[0], 404, "unknown_version")
+
+    except BadRequest as e:
+        return error_response(e.description, 400, "parse")
+
+    except ValueError as e:
+        return error_response(str(e), 400, "invalid_input")
+
+    except Exception as e:
+        return error_response(str(e), 500, "internal")
+
+@app.route("/predict/whatif", methods=["POST"])
+def predict_whatif():
+    # counterfactual sweep for one customer: every combination of the grid's
+    # values scored in one model call (whatif.py). Variants are hypothetical,
+    # so they skip the prediction cache and the drift monitor.
+    stage = g.timer.stage
+    try:
+        from whatif import sweep
+
+        with stage("parse"):
+            body = request.get_json()
+        if not isinstance(body, dict) or not isinstance(body.get("customer"), dict) \
+                or not isinstance(body.get("grid"), dict):
+            return error_response('body must be {"customer": {...}, "grid": {feature: [values]}}',
+                                  400, "invalid_input")
+
+        loaded = registry.get(request.args.get("model_version"))
+        result = sweep(loaded.model, body["customer"], body["grid"], decision_of(loaded.meta), stage)
+        result["model_version"] = loaded.version
+
+        metrics.ROWS.inc("predict_whatif", amount=len(result["probabilities"]) + 1)
+        return jsonify(result)
+
+    except UnknownModelVersion as e:
+        return error_response(e.args[0], 404, "unknown_version")
+
+    except BadRequest as e:
+        return error_response(e.description, 400, "parse")
+
+    except (TypeError, ValueError) as e:
+        return error_response(str(e), 400, "invalid_input")
 
     except Exception as e:
-        return jsonify({"error": str(e)})
+        return error_response(str(e), 500, "internal")
+
+@app.route("/stats")
+def stats():
+    return jsonify({
+        "model_version": registry.current.version,
+        "models": registry.stats(),
+        "batcher": batcher.stats() if batcher is not None else None,
+        "cache": cache.stats() if cache is not None else None
+    })
+
+@app.route("/models")
+def models():
+    return jsonify({"available": registry.available(), **registry.stats()})
+
+@app.route("/admin/models", methods=["POST"])
+def promote_model():
+    # disabled unless CHURN_ADMIN_TOKEN is set; promotion rewrites CURRENT so
+    # every worker's watcher picks the new version up, not just this one
+    if ADMIN_TOKEN is None:
+        return jsonify({"error": "not found"}), 404
+    if request.headers.get("Authorization") != f"Bearer {ADMIN_TOKEN}":
+        return jsonify({"error": "unauthorized"}), 401
+    if MODEL_DIR is None:
+        return jsonify({"error": "promotion needs a model registry (CHURN_MODEL_DIR)"}), 409
+
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("version"), str) or not body["version"]:
+        return jsonify({"error": 'body must be {"version": "<published version>"}'}), 400
+    try:
+        promote(MODEL_DIR, body["version"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    registry.wake()
+    return jsonify({"status": "loading", "version": body["version"]}), 202
+
+@app.route("/decision")
+def decision():
+    # the version's operating threshold and risk bands
+    try:
+        loaded = registry.get(request.args.get("model_version"))
+    except UnknownModelVersion as e:
+        return jsonify({"error": e.args[0]}), 404
+    return jsonify({"model_version": loaded.version, **decision_of(loaded.meta)})
+
+@app.route("/drift")
+def drift():
+    # live input / score distributions against the model's training profile
+    try:
+        loaded = registry.get(request.args.get("model_version"))
+    except UnknownModelVersion as e:
+        return jsonify({"error": e.args[0]}), 404
+    if loaded.drift is None:
+        return jsonify({"error": f"no drift profile for model version {loaded.version!r}"}), 404
+    return jsonify({"model_version": loaded.version, **loaded.drift.report()})
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,9 +1,15 @@
 import streamlit as st
-import requests
-import plotly.graph_objects as go
 
 st.set_page_config(layout="wide")
 
+
+@st.cache_resource
+def get_api():
+    # one pooled keep-alive client per Streamlit server, shared across reruns
+    from api_client import ChurnClient
+    return ChurnClient()
+
+
 st.markdown("""
 <style>
 body {
@@ -70,6 +76,9 @@ st.markdown('</div>', unsafe_allow_html=True)
 
 
 if predict:
+    # imported on first use so the form renders without waiting on them
+    import plotly.graph_objects as go
+
     data = {
         "age": age,
         "gender": gender,
@@ -83,7 +92,7 @@ if predict:
         "failed_transaction": failed_transaction
     }
 
-    res = requests.post("http://127.0.0.1:5000/predict", json=data).json()
+    res = get_api().predict(data)
     prob = res["probability"]
 
     fig = go.Figure(go.Indicator(
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    # Collects concurrent single-customer requests for up to `window_ms` (or
+    # `max_batch` requests) and scores them with one call to
+    # score_fn(DataFrame) -> (predictions, probabilities).
+    #
+    # The window is only waited out while traffic is concurrent (the queue
+    # or the previous batch held more than one request), so a lone request
+    # at low load is scored immediately.
+
+    def __init__(self, score_fn, window_ms=2.0, max_batch=64):
+        self.score_fn = score_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._last_size = 0
+
+        self.batches = 0
+        self.requests = 0
+        self.sizes = Counter()
+
+    def _ensure_thread(self):
+        # started lazily so a pre-forked worker gets its own thread
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+
+    def predict(self, record, timeout=10.0):
+        future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._items.append((record, future))
+            self._cond.notify()
+        return future.result(timeout)
+
+    def _collect(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+
+            if len(self._items) > 1 or self._last_size > 1:
+                deadline = time.perf_counter() + self.window
+                while len(self._items) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            n = min(self.max_batch, len(self._items))
+            self._last_size = n
+            return [self._items.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._score(batch)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.sizes[len(batch)] += 1
+
+    def _score(self, batch):
+        # imported here so app.py starts without pandas when the fast path serves /predict
+        import pandas as pd
+        from scoring import validate_frame
+
+        # rows are validated one by one, so a bad record fails on its own (as
+        # it would unbatched) instead of being NaN-padded into the batch
+        clean, errors = validate_frame(pd.DataFrame([record for record, _ in batch]))
+        for i, msg in errors.items():
+            batch[i][1].set_exception(ValueError(msg))
+        futures = [batch[i][1] for i in clean.index]
+        if not futures:
+            return
+
+        try:
+            pred, prob = self.score_fn(clean)
+            for future, p, q in zip(futures, pred, prob):
+                future.set_result((p, q))
+        except Exception:
+            # isolate the bad request(s) instead of failing the whole batch
+            for i, future in enumerate(futures):
+                try:
+                    pred, prob = self.score_fn(clean.iloc[[i]])
+                    future.set_result((pred[0], prob[0]))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": max(self.sizes, default=0),
+            "batch_sizes": {str(k): v for k, v in sorted(self.sizes.items())}
+        }
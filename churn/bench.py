@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BASELINE_PATH = "bench_baseline.json"
+BUNDLED_CSVS = [
+    "customer_data.csv",
+    "customer_data.csv.csv",
+    "customer_churn_noisy.csv",
+    "customer_churn_prevention system.csv"
+]
+
+
+def _timeit(fn, repeat=5, min_time=0.2):
+    # median seconds per call over `repeat` rounds of at least min_time each
+    rounds = []
+    for _ in range(repeat):
+        calls = 0
+        started = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        rounds.append(elapsed / calls)
+    return float(np.median(rounds))
+
+
+def _latencies_us(fn, n):
+    samples = np.empty(n)
+    for i in range(n):
+        t = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - t
+    return np.percentile(samples * 1e6, [50, 99])
+
+
+def _metric(value, unit, better):
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+# ---------- BENCHMARKS ----------
+def bench_predict_http(ctx):
+    # /predict through the Flask stack (in-process test client, no socket)
+    os.environ["CHURN_CACHE_SIZE"] = "0"
+    import app
+
+    client = app.app.test_client()
+    records = ctx["records"]
+    p50, p99 = _latencies_us(lambda i: client.post("/predict", json=records[i % len(records)]),
+                             ctx["single_n"])
+    return {
+        "p50_us": _metric(p50, "us", "lower"),
+        "p99_us": _metric(p99, "us", "lower")
+    }
+
+
+COLD_START_SCRIPT = """
+import json, time
+t = time.perf_counter()
+import app
+client = app.app.test_client()
+client.post("/predict", json=json.loads({record!r}))
+print((time.perf_counter() - t) * 1000)
+"""
+
+
+def bench_cold_start(ctx):
+    # import app.py and answer one /predict in a fresh interpreter
+    import subprocess
+
+    script = COLD_START_SCRIPT.format(record=json.dumps(ctx["records"][0]))
+    results = {}
+    for name, fast in [("pipeline", "0"), ("fast_path", "1")]:
+        env = {**os.environ, "CHURN_FAST_PATH": fast, "CHURN_MODEL_CHECK_S": "0"}
+        samples = [float(subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                                        capture_output=True, text=True).stdout)
+                   for _ in range(3)]
+        results[f"{name}_first_response_ms"] = _metric(np.median(samples), "ms", "lower")
+    return results
+
+
+def bench_fast_path(ctx):
+    from fastpath import LinearScorer
+
+    scorer = LinearScorer.from_pipeline(ctx["model"])
+    records = ctx["records"]
+    p50, p99 = _latencies_us(lambda i: scorer.predict_one(records[i % len(records)]), 20_000)
+    return {
+        "p50_us": _metric(p50, "us", "lower"),
+        "p99_us": _metric(p99, "us", "lower")
+    }
+
+
+def bench_predict_proba(ctx):
+    from scoring import add_features
+
+    results = {}
+    for n in ctx["sizes"]:
+        df = add_features(ctx["frame"].iloc[:n].copy())
+        seconds = _timeit(lambda: ctx["model"].predict_proba(df), repeat=3)
+        results[f"rows_{n}_per_s"] = _metric(n / seconds, "rows/s", "higher")
+    return results
+
+
+def bench_feature_engineering(ctx):
+    from scoring import add_features
+
+    df = ctx["frame"]
+    seconds = _timeit(lambda: add_features(df.copy()), repeat=3)
+    return {"rows_per_s": _metric(len(df) / seconds, "rows/s", "higher")}
+
+
+def bench_csv_load(ctx):
+    results = {}
+    for path in BUNDLED_CSVS:
+        seconds = _timeit(lambda: pd.read_csv(path), repeat=3)
+        results[re.sub(r"\W+", "_", path) + "_ms"] = _metric(seconds * 1000, "ms", "lower")
+    return results
+
+
+EXCEL_SCRIPT = """
+import time
+import pandas as pd
+import excel
+
+def status_kb(field):
+    # Linux /proc: VmHWM is this process's peak RSS (ru_maxrss survives exec)
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+base = status_kb("VmRSS:")
+t = time.perf_counter()
+if {streaming!r}:
+    first = None
+    for chunk in excel.iter_excel({path!r}, 50_000):
+        first = first or time.perf_counter() - t
+else:
+    pd.read_excel({path!r})
+    first = time.perf_counter() - t
+total = time.perf_counter() - t
+print(total, first, (status_kb("VmHWM:") - base) / 1024)
+"""
+
+
+def bench_excel_load(ctx):
+    # .xlsx ingestion for the Bulk page: pd.read_excel against the streaming
+    # reader, each in a fresh interpreter so peak RSS is its own
+    import subprocess
+    import tempfile
+
+    from openpyxl import Workbook
+
+    frame = ctx["frame"].iloc[:ctx["excel_rows"]]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "customers.xlsx")
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(list(frame.columns))
+        for row in frame.itertuples(index=False):
+            ws.append([v.item() if hasattr(v, "item") else v for v in row])
+        wb.save(path)
+
+        results = {}
+        for name, streaming in [("read_excel", False), ("streaming", True)]:
+            out = subprocess.run([sys.executable, "-c", EXCEL_SCRIPT.format(path=path, streaming=streaming)],
+                                 check=True, capture_output=True, text=True).stdout
+            total, first, peak_mb = map(float, out.split())
+            results[f"{name}_rows_per_s"] = _metric(len(frame) / total, "rows/s", "higher")
+            results[f"{name}_first_rows_ms"] = _metric(first * 1000, "ms", "lower")
+            results[f"{name}_peak_mb"] = _metric(peak_mb, "MB", "lower")
+    return results
+
+
+def bench_bulk_scoring(ctx):
+    # the loop behind the Bulk Processing Engine page
+    from scoring import score_chunks
+
+    df = ctx["frame"]
+    seconds = _timeit(lambda: sum(1 for _ in score_chunks(ctx["model"], df, 50_000)),
+                      repeat=3, min_time=0)
+    return {"rows_per_s": _metric(len(df) / seconds, "rows/s", "higher")}
+
+
+BENCHMARKS = {
+    "predict_http": bench_predict_http,
+    "cold_start": bench_cold_start,
+    "fast_path": bench_fast_path,
+    "predict_proba": bench_predict_proba,
+    "feature_engineering": bench_feature_engineering,
+    "csv_load": bench_csv_load,
+    "excel_load": bench_excel_load,
+    "bulk_scoring": bench_bulk_scoring
+}
+
+
+def build_context(quick=False):
+    import joblib
+    from generate_data import generate_chunk
+    from scoring import FEATURE_COLUMNS
+
+    rows = 100_000 if quick else 1_000_000
+    frame = generate_chunk(np.random.SeedSequence(0), 1, rows)[FEATURE_COLUMNS]
+    return {
+        "model": joblib.load("churn_model.pkl"),
+        "frame": frame,
+        "records": json.loads(frame.head(1000).to_json(orient="records")),
+        "sizes": [1, 100, 10_000, rows],
+        "single_n": 300 if quick else 2000,
+        "excel_rows": 10_000 if quick else 100_000
+    }
+
+
+def run(selected, quick=False, progress=None):
+    ctx = build_context(quick)
+    results = {}
+    for name in selected:
+        if progress:
+            progress(name)
+        results[name] = BENCHMARKS[name](ctx)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, tolerance=0.2):
+    # one row per metric present in both runs; a regression is a change in
+    # the wrong direction by more than `tolerance`
+    rows = []
+    for bench, metrics in current["results"].items():
+        for name, m in metrics.items():
+            base = baseline.get("results", {}).get(bench, {}).get(name)
+            if base is None or base["value"] == 0:
+                continue
+            ratio = m["value"] / base["value"]
+            worse = ratio < 1 - tolerance if m["better"] == "higher" else ratio > 1 + tolerance
+            rows.append({
+                "benchmark": bench,
+                "metric": name,
+                "baseline": base["value"],
+                "current": m["value"],
+                "ratio": ratio,
+                "regression": bool(worse)
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scoring, serving and data-loading hot paths.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    result = run(args.only, args.quick, lambda name: print(f"running {name}...", file=sys.stderr))
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            result["comparison"] = compare(result, json.load(f), args.tolerance)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+
+    regressions = [r for r in result.get("comparison", []) if r["regression"]]
+    for r in result.get("comparison", []):
+        flag = "REGRESSION" if r["regression"] else "ok"
+        print(f"{r['benchmark']}.{r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} "
+              f"({r['ratio']:.2f}x) {flag}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+
+def cache_key(record):
+    # canonical feature tuple of a record from schema.validate_record
+    # (categoricals str, numerics float); None if the record cannot be normalized
+    try:
+        return tuple(
+            str(record[col]) if col in CATEGORICAL_COLUMNS else float(record[col])
+            for col in FEATURE_COLUMNS
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class PredictionCache:
+    # Bounded LRU cache with a per-entry TTL. Entries belong to one model
+    # version; switching version clears the cache.
+
+    def __init__(self, maxsize=10_000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_version(self, version):
+        with self._lock:
+            if version != self.version:
+                if self._data:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "model_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
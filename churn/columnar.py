@@ -0,0 +1,270 @@
+import argparse
+import io
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# .ccol layout: MAGIC, u64 header length, JSON header, then one 64-byte
+# aligned block per column. Categoricals are stored as small-int codes (-1 for
+# missing) with their dictionary in the header; numerics as fixed-width
+# little-endian arrays narrowed to the smallest dtype that holds them.
+MAGIC = b"CCOL1\n"
+ALIGN = 64
+SUFFIX = ".ccol"
+
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def is_columnar(name):
+    return str(name).lower().endswith(SUFFIX)
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _narrow_int(lo, hi):
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _code_dtype(n_categories):
+    return _narrow_int(-1, max(n_categories - 1, 0))
+
+
+# ---------- WRITING ----------
+class _ColumnSpool:
+    # accumulates one column chunk by chunk in a temp file, tracking what is
+    # needed to pick the final fixed-width dtype
+
+    def __init__(self, name, path, categorical):
+        self.name = name
+        self.categorical = categorical
+        self.path = path
+        self.file = open(self.path, "wb")
+        self.rows = 0
+        self.categories = {}
+        self.integral = True
+        self.lo = np.inf
+        self.hi = -np.inf
+
+    def append(self, series):
+        if not self.categorical:
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            if (np.isnan(values) & series.notna().to_numpy()).any():
+                # text in a column that looked numeric in the first chunk: keep
+                # every value by turning the whole column categorical
+                self._to_categorical()
+        if self.categorical:
+            self._append_codes(series)
+        else:
+            finite = values[np.isfinite(values)]
+            if len(finite) != len(values) or not np.all(finite == np.round(finite)):
+                self.integral = False
+            if len(finite):
+                self.lo = min(self.lo, finite.min())
+                self.hi = max(self.hi, finite.max())
+            self.file.write(values.tobytes())
+        self.rows += len(series)
+
+    def _append_codes(self, series):
+        # factorize the chunk, then map its (few) uniques onto the global dictionary
+        local, uniques = pd.factorize(series.astype(object))
+        mapping = np.array(
+            [self.categories.setdefault(str(u), len(self.categories)) for u in uniques] + [-1],
+            dtype=np.int32
+        )
+        self.file.write(mapping[local].tobytes())
+
+    def _to_categorical(self, block=1 << 20):
+        # re-encode the float64 values spooled so far as category codes
+        self.file.close()
+        numeric = self.path + ".num"
+        os.replace(self.path, numeric)
+        self.categorical = True
+        self.file = open(self.path, "wb")
+        with open(numeric, "rb") as f:
+            while True:
+                buf = f.read(block * 8)
+                if not buf:
+                    break
+                self._append_codes(pd.Series(np.frombuffer(buf, dtype=np.float64)).map(_number_label))
+        os.remove(numeric)
+
+    def final_dtype(self):
+        if self.categorical:
+            return _code_dtype(len(self.categories))
+        if self.integral and self.rows:
+            return _narrow_int(self.lo, self.hi)
+        return np.dtype(np.float64)
+
+    def copy_into(self, out, block=1 << 20):
+        self.file.close()
+        src_dtype = np.int32 if self.categorical else np.float64
+        dtype = self.final_dtype().newbyteorder("<")
+        with open(self.path, "rb") as f:
+            while True:
+                buf = f.read(block * np.dtype(src_dtype).itemsize)
+                if not buf:
+                    break
+                out.write(np.frombuffer(buf, dtype=src_dtype).astype(dtype).tobytes())
+
+
+def _number_label(value):
+    if np.isnan(value):
+        return None
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _is_categorical(series):
+    return not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series))
+
+
+def write_columnar(chunks, path):
+    # chunks: iterable of DataFrames with the same columns (a single frame works too)
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        spools = None
+        for chunk in chunks:
+            if spools is None:
+                spools = [_ColumnSpool(c, os.path.join(tmp, f"{i}.bin"), _is_categorical(chunk[c]))
+                          for i, c in enumerate(chunk.columns)]
+            for spool in spools:
+                spool.append(chunk[spool.name])
+        spools = spools or []
+        rows = spools[0].rows if spools else 0
+
+        columns = []
+        offset = 0
+        for spool in spools:
+            dtype = spool.final_dtype().newbyteorder("<")
+            entry = {
+                "name": spool.name,
+                "dtype": dtype.str,
+                "offset": offset,
+                "nbytes": rows * dtype.itemsize
+            }
+            if spool.categorical:
+                entry["categories"] = list(spool.categories)
+            columns.append(entry)
+            offset = _aligned(offset + entry["nbytes"])
+
+        header = json.dumps({"rows": rows, "columns": columns}).encode()
+        data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+        with open(path, "wb") as out:
+            out.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for spool, entry in zip(spools, columns):
+                out.write(b"\0" * (data_start + entry["offset"] - out.tell()))
+                spool.copy_into(out)
+
+
+def convert(input_path, output_path, chunk_size=500_000):
+    if input_path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        chunks = (b.to_pandas() for b in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size))
+    else:
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    write_columnar(chunks, output_path)
+
+
+# ---------- READING ----------
+def read_header(buf):
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("not a .ccol file")
+    (length,) = struct.unpack("<Q", bytes(buf[len(MAGIC):len(MAGIC) + 8]))
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(buf[start:start + length]))
+    header["data_start"] = _aligned(start + length)
+    return header
+
+
+def read_columnar(source, columns=None):
+    # source: path (memory-mapped, nothing is read until touched) or bytes /
+    # file-like such as a Streamlit upload (viewed in place, no copy)
+    if isinstance(source, (str, os.PathLike)):
+        buf = np.memmap(source, dtype=np.uint8, mode="r")
+    else:
+        if hasattr(source, "getvalue"):
+            data = source.getvalue()
+        elif hasattr(source, "read"):
+            data = source.read()
+        else:
+            data = source
+        buf = np.frombuffer(data, dtype=np.uint8)
+
+    header = read_header(buf)
+    wanted = set(columns) if columns is not None else None
+
+    data = {}
+    for entry in header["columns"]:
+        if wanted is not None and entry["name"] not in wanted:
+            continue
+        start = header["data_start"] + entry["offset"]
+        values = buf[start:start + entry["nbytes"]].view(np.dtype(entry["dtype"]))
+        if "categories" in entry:
+            values = pd.Categorical.from_codes(values, entry["categories"])
+        data[entry["name"]] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+def iter_columnar(path, chunk_size):
+    df = read_columnar(path)
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def read_table(source, name=None):
+    # dispatch on file name: .ccol, .parquet or CSV
+    name = str(name if name is not None else source).lower()
+    if is_columnar(name):
+        return read_columnar(source)
+    if name.endswith((".parquet", ".pq")):
+        return pd.read_parquet(source)
+    if not isinstance(source, (str, os.PathLike)) and hasattr(source, "getvalue"):
+        source = io.BytesIO(source.getvalue())
+    return pd.read_csv(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert customer tables to and inspect the .ccol columnar format.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("convert", help="CSV/Parquet -> .ccol")
+    p.add_argument("input")
+    p.add_argument("output", nargs="?")
+    p.add_argument("--chunk-size", type=int, default=500_000)
+
+    p = sub.add_parser("info", help="print the schema of a .ccol file")
+    p.add_argument("path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        output = args.output or os.path.splitext(args.input)[0] + SUFFIX
+        started = time.perf_counter()
+        convert(args.input, output, args.chunk_size)
+        print(f"Wrote {output} ({os.path.getsize(output) / 1e6:,.1f} MB, "
+              f"source {os.path.getsize(args.input) / 1e6:,.1f} MB) "
+              f"in {time.perf_counter() - started:.2f}s")
+    else:
+        header = read_header(np.memmap(args.path, dtype=np.uint8, mode="r"))
+        print(f"{header['rows']:,} rows")
+        for entry in header["columns"]:
+            extra = f" {len(entry['categories'])} categories" if "categories" in entry else ""
+            print(f"  {entry['name']:<22} {entry['dtype']:<5}{extra}")
+
+
+if __name__ == "__main__":
+    main()
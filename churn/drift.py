@@ -0,0 +1,308 @@
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+# Reference profile (<model>.drift.json, written at training time): per
+# feature, the bin edges or category set and the training share of each bin.
+# The monitor keeps, per feature, a count vector for the current window and
+# for all traffic since startup, plus running moments. Memory is fixed by the
+# bin count, and each request costs one bisect per feature.
+PROBABILITY = "probability"
+MAX_DISCRETE = 20
+QUANTILE_BINS = 10
+PROBABILITY_EDGES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+EPS = 1e-4
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# PSI over a handful of rows is noise: below this many a feature is not rated
+MIN_OBSERVATIONS = 100
+
+
+def profile_path(model_path):
+    return os.path.splitext(model_path)[0] + ".drift.json"
+
+
+# ---------- REFERENCE PROFILE ----------
+def _numeric_edges(values):
+    import numpy as np
+
+    unique = np.unique(values)
+    if len(unique) <= MAX_DISCRETE:
+        # one bin per observed value
+        return ((unique[:-1] + unique[1:]) / 2).tolist()
+    qs = np.quantile(values, np.linspace(0, 1, QUANTILE_BINS + 1)[1:-1])
+    return np.unique(qs).tolist()
+
+
+def _shares(counts):
+    total = sum(counts)
+    return [c / total if total else 0.0 for c in counts]
+
+
+def build_profile(df, probabilities=None):
+    # df: training rows with the raw FEATURE_COLUMNS; probabilities: the
+    # model's scores for the same rows
+    import numpy as np
+
+    features = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORICAL_COLUMNS:
+            counts = df[col].dropna().astype(str).value_counts()
+            categories = sorted(counts.index)
+            features[col] = {
+                "kind": "categorical",
+                "categories": categories,
+                "shares": _shares([int(counts[c]) for c in categories] + [0])
+            }
+        else:
+            values = df[col].to_numpy(dtype=float)
+            values = values[np.isfinite(values)]
+            edges = _numeric_edges(values)
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            features[col] = {
+                "kind": "numeric",
+                "edges": edges,
+                "shares": _shares(counts.tolist()),
+                "mean": float(values.mean()),
+                "std": float(values.std())
+            }
+
+    if probabilities is not None:
+        probabilities = np.asarray(probabilities, dtype=float)
+        counts = np.bincount(np.searchsorted(PROBABILITY_EDGES, probabilities, side="right"),
+                             minlength=len(PROBABILITY_EDGES) + 1)
+        features[PROBABILITY] = {
+            "kind": "numeric",
+            "edges": PROBABILITY_EDGES,
+            "shares": _shares(counts.tolist()),
+            "mean": float(probabilities.mean()),
+            "std": float(probabilities.std())
+        }
+
+    return {"rows": int(len(df)), "features": features}
+
+
+def save_profile(profile, path):
+    with open(path, "w") as f:
+        json.dump(profile, f)
+
+
+def load_profile(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def psi(expected, actual_counts):
+    # population stability index of observed counts against reference shares
+    total = sum(actual_counts)
+    if not total:
+        return None
+    value = 0.0
+    for e, c in zip(expected, actual_counts):
+        a = max(c / total, EPS)
+        e = max(e, EPS)
+        value += (a - e) * math.log(a / e)
+    return value
+
+
+def status(value, n=None):
+    if value is None:
+        return "no data"
+    if n is not None and n < MIN_OBSERVATIONS:
+        return "too few rows"
+    return "alert" if value >= PSI_ALERT else "warn" if value >= PSI_WARN else "ok"
+
+
+# ---------- ONLINE MONITOR ----------
+class _FeatureSketch:
+    __slots__ = ("spec", "window", "total", "n", "mean", "m2", "index")
+
+    def __init__(self, spec):
+        self.spec = spec
+        bins = len(spec["shares"])
+        self.window = [0] * bins
+        self.total = [0] * bins
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        if spec["kind"] == "categorical":
+            self.index = {c: i for i, c in enumerate(spec["categories"])}
+
+    def add(self, value):
+        if self.spec["kind"] == "categorical":
+            b = self.index.get(str(value), len(self.window) - 1)
+        else:
+            try:
+                x = float(value)
+            except (TypeError, ValueError):
+                return
+            if not math.isfinite(x):
+                return
+            # Welford running mean / variance
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+            b = bisect_right(self.spec["edges"], x)
+        self.window[b] += 1
+        self.total[b] += 1
+
+    def add_counts(self, counts, values=None):
+        for b, c in enumerate(counts):
+            self.window[b] += c
+            self.total[b] += c
+        if values is not None and len(values):
+            # Chan et al. parallel merge of the batch's moments
+            import numpy as np
+            n_b = len(values)
+            mean_b = float(np.mean(values))
+            m2_b = float(np.var(values)) * n_b
+            n = self.n + n_b
+            delta = mean_b - self.mean
+            self.mean += delta * n_b / n
+            self.m2 += m2_b + delta * delta * self.n * n_b / n
+            self.n = n
+
+    def close_window(self):
+        value = psi(self.spec["shares"], self.window)
+        self.window = [0] * len(self.window)
+        return value
+
+
+class DriftMonitor:
+    def __init__(self, profile, window=1000, history=24):
+        self.profile = profile
+        self.window_size = window
+        self.sketches = {name: _FeatureSketch(spec) for name, spec in profile["features"].items()}
+        self.history = deque(maxlen=history)
+        self.observations = 0
+        self.in_window = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, record, probability=None):
+        # O(features): one dict lookup or bisect each
+        with self._lock:
+            for name, sketch in self.sketches.items():
+                if name == PROBABILITY:
+                    if probability is not None:
+                        sketch.add(probability)
+                elif name in record:
+                    sketch.add(record[name])
+            self.observations += 1
+            self.in_window += 1
+            if self.in_window >= self.window_size:
+                self._close_window()
+
+    def observe_frame(self, df, probabilities=None):
+        # vectorized observe for /predict/batch: bincount per feature, split at
+        # window boundaries so windows stay exactly `window` rows long
+        import numpy as np
+        import pandas as pd
+
+        start = 0
+        while start < len(df):
+            with self._lock:
+                stop = min(len(df), start + self.window_size - self.in_window)
+                part = df.iloc[start:stop]
+                for name, sketch in self.sketches.items():
+                    spec = sketch.spec
+                    if name == PROBABILITY:
+                        if probabilities is None:
+                            continue
+                        raw = pd.Series(np.asarray(probabilities[start:stop], dtype=float))
+                    elif name in part.columns:
+                        raw = part[name]
+                    else:
+                        continue
+
+                    if spec["kind"] == "categorical":
+                        raw = raw.dropna().astype(str)
+                        idx = raw.map(sketch.index).fillna(len(sketch.window) - 1).to_numpy(dtype=int)
+                        sketch.add_counts(np.bincount(idx, minlength=len(sketch.window)).tolist())
+                    else:
+                        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+                        values = values[np.isfinite(values)]
+                        idx = np.searchsorted(spec["edges"], values, side="right")
+                        sketch.add_counts(np.bincount(idx, minlength=len(sketch.window)).tolist(), values)
+
+                self.observations += len(part)
+                self.in_window += len(part)
+                if self.in_window >= self.window_size:
+                    self._close_window()
+            start = stop
+
+    def _close_window(self):
+        self.history.append({
+            "end": self.observations,
+            "rows": self.in_window,
+            "closed_at": time.time(),
+            "psi": {name: sketch.close_window() for name, sketch in self.sketches.items()}
+        })
+        self.in_window = 0
+
+    def report(self):
+        with self._lock:
+            features = {}
+            for name, sketch in self.sketches.items():
+                spec = sketch.spec
+                value = psi(spec["shares"], sketch.total)
+                n = sum(sketch.total)
+                entry = {
+                    "kind": spec["kind"],
+                    "psi": value,
+                    "observations": n,
+                    "status": status(value, n),
+                    "window_psi": [w["psi"][name] for w in self.history]
+                }
+                if spec["kind"] == "numeric":
+                    entry.update({
+                        "mean": sketch.mean if sketch.n else None,
+                        "std": math.sqrt(sketch.m2 / sketch.n) if sketch.n else None,
+                        "reference_mean": spec["mean"],
+                        "reference_std": spec["std"]
+                    })
+                features[name] = entry
+
+            latest = self.history[-1] if self.history else {"psi": {}, "rows": 0}
+            return {
+                "observations": self.observations,
+                "window_size": self.window_size,
+                "windows": len(self.history),
+                "since": self.started,
+                "reference_rows": self.profile["rows"],
+                "alerts": sorted(n for n, v in latest["psi"].items() if status(v, latest["rows"]) == "alert"),
+                "features": features
+            }
+
+
+def main(argv=None):
+    import joblib
+
+    from columnar import read_table
+    from scoring import add_features, score_frame
+
+    parser = argparse.ArgumentParser(description="Build the drift reference profile for a model.")
+    parser.add_argument("--data", default="customer_churn_prevention system.csv",
+                        help="training data (.csv, .parquet or .ccol)")
+    parser.add_argument("--model", default="churn_model.pkl")
+    args = parser.parse_args(argv)
+
+    df = read_table(args.data)[FEATURE_COLUMNS].dropna()
+    _, probs = score_frame(joblib.load(args.model), add_features(df.copy()))
+    save_profile(build_profile(df, probs), profile_path(args.model))
+    print(f"Wrote {profile_path(args.model)} from {len(df):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# Streaming .xlsx reader. pd.read_excel builds openpyxl's full workbook model
+# (every cell as a Python object) before returning a frame. Here the sheet is
+# opened read-only: rows are parsed lazily from the XML and turned into typed
+# column arrays one chunk at a time, so memory is bounded by chunk_size and
+# scoring can start after the first chunk.
+SAMPLE_ROWS = 100
+SUFFIXES = (".xlsx", ".xlsm")
+
+
+def is_excel(name):
+    return str(name).lower().endswith(SUFFIXES)
+
+
+def _open(source, sheet=None):
+    from openpyxl import load_workbook
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    ws = wb[sheet] if sheet else wb.worksheets[0]
+    if ws.max_row is not None and ws.max_row <= 1:
+        # some exporters write a bare <dimension ref="A1"/>; read-only mode
+        # would stop after that one row, so read the sheet unsized instead
+        ws.reset_dimensions()
+    return wb, ws
+
+
+def _header(ws):
+    first = next(ws.iter_rows(max_row=1, values_only=True), ())
+    return [str(v) if v is not None else f"column_{i + 1}" for i, v in enumerate(first)]
+
+
+def _rows(ws, width):
+    # data rows as tuples, skipping blank ones (trailing formatted rows are common)
+    for row in ws.iter_rows(min_row=2, max_col=width, values_only=True):
+        if row.count(None) < width:
+            yield row
+
+
+def _kinds(rows, width):
+    # "number" when every non-empty sampled value is numeric, else "text"
+    kinds = []
+    for j in range(width):
+        values = [r[j] for r in rows if j < len(r) and r[j] is not None]
+        numeric = values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+        kinds.append("number" if numeric else "text")
+    return kinds
+
+
+def _frame(columns, names, kinds):
+    # one list of cell values per column -> one typed array per column
+    data = {}
+    for name, kind, values in zip(names, kinds, columns):
+        values = np.array(values, dtype=object)
+        data[name] = pd.to_numeric(values, errors="coerce") if kind == "number" else values
+    return pd.DataFrame(data)
+
+
+def _columns(rows, width):
+    return [list(col) for col in zip(*rows)] if rows else [[] for _ in range(width)]
+
+
+def _sheet_path(z, title):
+    # the sheet's part name, from the workbook's relationships (xl/workbook.xml
+    # names each sheet's r:id, xl/_rels/workbook.xml.rels maps it to a file)
+    from xml.etree import ElementTree
+
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+          "rel": "http://schemas.openxmlformats.org/package/2006/relationships"}
+    rid = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+    workbook = ElementTree.fromstring(z.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels.findall("rel:Relationship", ns)}
+    for sheet in workbook.iterfind("m:sheets/m:sheet", ns):
+        if sheet.get("name") == title:
+            target = targets[sheet.get(rid)]
+            return target.lstrip("/") if target.startswith("/") else "xl/" + target
+    raise KeyError(title)
+
+
+def _count_rows(source, title):
+    # <row> elements in the sheet XML, counted on the raw bytes as they are
+    # decompressed: no cells are parsed. Blank formatted rows are included.
+    if hasattr(source, "seek"):
+        source.seek(0)
+    count, tail = 0, b""
+    with zipfile.ZipFile(source) as z, z.open(_sheet_path(z, title)) as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            data = tail + block
+            count += data.count(b"<row ") + data.count(b"<row>")
+            tail = data[-4:]
+    return max(count - 1, 0)
+
+
+def excel_info(source, sheet=None):
+    # schema, row count and a preview without reading past SAMPLE_ROWS; the
+    # count comes from the sheet's <dimension> record, or a byte scan of the
+    # sheet when it is missing or a bare "A1" (see _open)
+    wb, ws = _open(source, sheet)
+    try:
+        names = _header(ws)
+        sample = []
+        for row in _rows(ws, len(names)):
+            sample.append(row)
+            if len(sample) >= SAMPLE_ROWS:
+                break
+        kinds = _kinds(sample, len(names))
+        rows = ws.max_row - 1 if ws.max_row else _count_rows(source, ws.title)
+        return {
+            "sheet": ws.title,
+            "sheets": wb.sheetnames,
+            "rows": rows,
+            "columns": [{"name": n, "kind": k} for n, k in zip(names, kinds)],
+            "preview": _frame(_columns(sample[:10], len(names)), names, kinds)
+        }
+    finally:
+        wb.close()
+
+
+def iter_excel(source, chunk_size=50_000, sheet=None, kinds=None):
+    # yields DataFrames of at most chunk_size rows; column types are fixed
+    # from the first SAMPLE_ROWS rows so every chunk has the same dtypes
+    wb, ws = _open(source, sheet)
+    try:
+        names = _header(ws)
+        width = len(names)
+        if kinds is None:
+            sample = []
+            for row in _rows(ws, width):
+                sample.append(row)
+                if len(sample) >= SAMPLE_ROWS:
+                    break
+            kinds = _kinds(sample, width)
+
+        # cells go straight into per-column lists: holding tens of thousands
+        # of row tuples instead makes the cyclic GC rescan them on every pass
+        columns = [[] for _ in range(width)]
+        appends = [c.append for c in columns]
+        n = 0
+        for row in _rows(ws, width):
+            for append, value in zip(appends, row):
+                append(value)
+            n += 1
+            if n >= chunk_size:
+                yield _frame(columns, names, kinds)
+                columns = [[] for _ in range(width)]
+                appends = [c.append for c in columns]
+                n = 0
+        if n:
+            yield _frame(columns, names, kinds)
+    finally:
+        wb.close()
+
+
+def read_excel(source, chunk_size=50_000, sheet=None):
+    frames = list(iter_excel(source, chunk_size, sheet))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or convert an .xlsx sheet with the streaming reader.")
+    parser.add_argument("path")
+    parser.add_argument("--sheet")
+    parser.add_argument("--csv", help="also stream the sheet into this CSV file")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    info = excel_info(args.path, args.sheet)
+    print(f"sheet {info['sheet']!r}: {info['rows']:,} rows")
+    for col in info["columns"]:
+        print(f"  {col['name']:<22} {col['kind']}")
+
+    if args.csv:
+        started = time.perf_counter()
+        written = 0
+        with open(args.csv, "w", newline="") as f:
+            for chunk in iter_excel(args.path, args.chunk_size, args.sheet):
+                chunk.to_csv(f, header=written == 0, index=False)
+                written += len(chunk)
+        print(f"Wrote {written:,} rows to {args.csv} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
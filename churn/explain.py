@@ -0,0 +1,150 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from scoring import add_features, validate_frame
+
+
+class LinearExplainer:
+    # Exact per-feature log-odds contributions for a fitted
+    # Pipeline(ColumnTransformer(OneHotEncoder, StandardScaler), linear model).
+    #
+    # Each transformed column's coefficient is summed into its source feature,
+    # so a whole batch is explained by one (n x p) @ (p x features) product.
+    # Numeric contributions are relative to the training mean (the scaler
+    # centres them). Each categorical is centred on the mean weight of its
+    # categories, and that mean moves into `base`. So for every row:
+    #     logit = base + contributions.sum()
+    # and predict_proba is sigmoid(logit).
+
+    def __init__(self, preprocessor, weights, offsets, base, features, classes):
+        self.preprocessor = preprocessor
+        self.weights = weights
+        self.offsets = offsets
+        self.base = float(base)
+        self.features = np.asarray(features, dtype=object)
+        self.classes = np.asarray(classes)
+
+    @classmethod
+    def from_pipeline(cls, model):
+        preprocessor = model.steps[0][1]
+        classifier = model.steps[-1][1]
+        if len(model.steps) != 2 or not hasattr(preprocessor, "transformers_"):
+            raise ValueError("explanations need Pipeline(ColumnTransformer, linear model)")
+
+        coef = np.asarray(getattr(classifier, "coef_", np.empty((0, 0))), dtype=float)
+        if coef.shape[0] != 1 or len(classifier.classes_) != 2:
+            raise ValueError("explanations need a binary linear classifier")
+        coef = coef[0]
+
+        features, groups, offsets = [], [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            columns = list(columns)
+            if hasattr(transformer, "categories_"):
+                for col, cats in zip(columns, transformer.categories_):
+                    w = coef[len(groups):len(groups) + len(cats)]
+                    offsets.append(float(w.mean()))
+                    groups += [len(features)] * len(cats)
+                    features.append(col)
+            else:
+                for col in columns:
+                    offsets.append(0.0)
+                    groups.append(len(features))
+                    features.append(col)
+
+        if len(groups) != len(coef):
+            raise ValueError("transformer output width does not match the classifier")
+
+        weights = np.zeros((len(coef), len(features)))
+        weights[np.arange(len(coef)), groups] = coef
+        offsets = np.array(offsets)
+        base = float(np.ravel(classifier.intercept_)[0]) + offsets.sum()
+        return cls(preprocessor, weights, offsets, base, features, classifier.classes_)
+
+    def contributions(self, df):
+        # df: valid rows with engineered features -> (n x features) log-odds
+        X = self.preprocessor.transform(df)
+        return np.asarray(X @ self.weights) - self.offsets
+
+    def top_k(self, contributions, k):
+        # column indices and values of the k largest |contributions| per row,
+        # strongest first; argpartition keeps this O(n * features)
+        k = min(k, contributions.shape[1])
+        if k <= 0:
+            return np.empty((len(contributions), 0), dtype=int), np.empty((len(contributions), 0))
+        magnitude = -np.abs(contributions)
+        idx = np.argpartition(magnitude, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(magnitude, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        return idx, np.take_along_axis(contributions, idx, axis=1)
+
+    def score(self, df, k):
+        # predictions, probabilities and top-k drivers from a single transform
+        contributions = self.contributions(df)
+        logit = self.base + contributions.sum(axis=1)
+        prob = 1.0 / (1.0 + np.exp(-logit))
+        pred = self.classes[(logit > 0).astype(int)]
+        idx, values = self.top_k(contributions, k)
+        return pred, prob, idx, values
+
+    def records(self, df, idx, values):
+        # JSON-ready [{"feature", "value", "contribution"}, ...] per row
+        names = self.features[idx]
+        out = []
+        for i, (row_names, row_values) in enumerate(zip(names.tolist(), values.tolist())):
+            out.append([
+                {"feature": f, "value": _json_value(df[f].iat[i]), "contribution": c}
+                for f, c in zip(row_names, row_values)
+            ])
+        return out
+
+
+def _json_value(v):
+    return v.item() if hasattr(v, "item") else v
+
+
+_explainers = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def explainer_for(model):
+    # one explainer per fitted pipeline, built on first use
+    with _lock:
+        explainer = _explainers.get(model)
+        if explainer is None:
+            explainer = _explainers[model] = LinearExplainer.from_pipeline(model)
+        return explainer
+
+
+def explain_rows(model, df, k=3):
+    # score_rows with explanations: every row of df keeps its position and
+    # rows that fail validation get NaN / None
+    explainer = explainer_for(model)
+    df = df.reset_index(drop=True)
+    clean, _ = validate_frame(df)
+
+    pred = np.full(len(df), np.nan)
+    prob = np.full(len(df), np.nan)
+    names = np.full((len(df), min(k, len(explainer.features))), None, dtype=object)
+    values = np.full(names.shape, np.nan)
+
+    if len(clean):
+        valid = clean.index.to_numpy()
+        p, q, idx, v = explainer.score(add_features(clean), k)
+        pred[valid], prob[valid] = p, q
+        names[valid] = explainer.features[idx]
+        values[valid] = v
+    return pred, prob, names, values
+
+
+def driver_columns(names, values):
+    # explain_rows output as driver_1, driver_1_contribution, ... columns
+    columns = {}
+    for j in range(names.shape[1]):
+        columns[f"driver_{j + 1}"] = names[:, j]
+        columns[f"driver_{j + 1}_contribution"] = values[:, j]
+    return pd.DataFrame(columns)
@@ -0,0 +1,227 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+BUNDLED_CSVS = [
+    "customer_data.csv",
+    "customer_data.csv.csv",
+    "customer_churn_noisy.csv",
+    "customer_churn_prevention system.csv"
+]
+
+
+def scorer_path(model_path):
+    # <model>.fast.json next to the pickle, like train.py's <model>.meta.json
+    return os.path.splitext(model_path)[0] + ".fast.json"
+
+
+def model_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def derived_values(record):
+    # same clip and engineered features as scoring.add_features, on plain floats
+    tenure = max(float(record["tenure"]), 1.0)
+    values = dict(record)
+    values["tenure"] = tenure
+    values["charge_per_tenure"] = float(record["monthly_charge"]) / (tenure + 1)
+    values["income_per_family"] = float(record["income_numeric"]) / (tenure + 1)
+    return values
+
+
+class LinearScorer:
+    # Flattened Pipeline(ColumnTransformer(OneHotEncoder, StandardScaler), linear model):
+    # one-hot weights become per-column lookup tables and the scaler's mean and
+    # scale are folded into the numeric weights and the intercept.
+
+    def __init__(self, intercept, categorical, numeric, classes):
+        self.intercept = float(intercept)
+        self.categorical = categorical
+        self.numeric = numeric
+        self.classes = list(classes)
+
+    @classmethod
+    def from_pipeline(cls, model):
+        import numpy as np
+
+        preprocessor = model.steps[0][1]
+        classifier = model.steps[-1][1]
+
+        coef = np.asarray(classifier.coef_, dtype=float)
+        if coef.shape[0] != 1 or len(classifier.classes_) != 2:
+            raise ValueError("fast path supports binary linear classifiers only")
+        coef = coef[0]
+        intercept = float(np.ravel(classifier.intercept_)[0])
+
+        categorical = {}
+        numeric = []
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            columns = list(columns)
+
+            if transformer == "passthrough":
+                for col in columns:
+                    numeric.append((col, float(coef[offset])))
+                    offset += 1
+
+            elif hasattr(transformer, "categories_"):
+                if transformer.drop is not None:
+                    raise ValueError("fast path does not support OneHotEncoder(drop=...)")
+                for col, cats in zip(columns, transformer.categories_):
+                    categorical[col] = {
+                        str(c): float(w) for c, w in zip(cats, coef[offset:offset + len(cats)])
+                    }
+                    offset += len(cats)
+
+            elif hasattr(transformer, "n_features_in_") and hasattr(transformer, "scale_"):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                for col, m, s in zip(columns, mean, scale):
+                    w = float(coef[offset]) / float(s)
+                    numeric.append((col, w))
+                    intercept -= w * float(m)
+                    offset += 1
+
+            else:
+                raise ValueError(f"fast path cannot fold transformer '{name}'")
+
+        if offset != len(coef):
+            raise ValueError("transformer output width does not match the classifier")
+
+        return cls(intercept, categorical, numeric, classifier.classes_.tolist())
+
+    # ---- JSON form: lets the API serve /predict without unpickling sklearn ----
+    def to_dict(self):
+        return {
+            "intercept": self.intercept,
+            "categorical": self.categorical,
+            "numeric": self.numeric,
+            "classes": self.classes
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["intercept"], d["categorical"], [tuple(n) for n in d["numeric"]], d["classes"])
+
+    def save(self, path, model_path):
+        # the model's digest ties the weights to the exact pickle they came from
+        with open(path, "w") as f:
+            json.dump({"model_digest": model_digest(model_path), **self.to_dict()}, f)
+
+    @classmethod
+    def load(cls, path, model_path):
+        # None when missing or written for a different pickle
+        try:
+            with open(path) as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if d.get("model_digest") != model_digest(model_path):
+            return None
+        return cls.from_dict(d)
+
+    def decision(self, record):
+        values = derived_values(record)
+        z = self.intercept
+        for col, table in self.categorical.items():
+            # unseen categories score as all-zero one-hot (handle_unknown="ignore")
+            z += table.get(str(values[col]), 0.0)
+        for col, w in self.numeric:
+            z += w * float(values[col])
+        return z
+
+    def predict_one(self, record):
+        z = self.decision(record)
+        pred = self.classes[1] if z > 0 else self.classes[0]
+        return pred, _sigmoid(z)
+
+
+# ---------- PARITY CHECK ----------
+def check_parity(model, scorer, paths=BUNDLED_CSVS, tolerance=1e-9):
+    import numpy as np
+    import pandas as pd
+    from scoring import FEATURE_COLUMNS, add_features, score_frame
+
+    report = []
+    for path in paths:
+        df = pd.read_csv(path)
+        records = df[FEATURE_COLUMNS].to_dict("records")
+
+        pred, prob = score_frame(model, add_features(df[FEATURE_COLUMNS].copy()))
+        fast = [scorer.predict_one(r) for r in records]
+        fast_pred = np.array([p for p, _ in fast])
+        fast_prob = np.array([q for _, q in fast])
+
+        report.append({
+            "path": path,
+            "rows": len(df),
+            "max_abs_diff": float(np.max(np.abs(fast_prob - prob))) if len(df) else 0.0,
+            "label_mismatches": int((fast_pred != pred).sum())
+        })
+
+    ok = all(r["max_abs_diff"] <= tolerance and r["label_mismatches"] == 0 for r in report)
+    return ok, report
+
+
+def _latency_us(fn, records, repeat):
+    import numpy as np
+
+    samples = []
+    for i in range(repeat):
+        record = records[i % len(records)]
+        t = time.perf_counter()
+        fn(record)
+        samples.append((time.perf_counter() - t) * 1e6)
+    return np.percentile(samples, [50, 99])
+
+
+def main(argv=None):
+    import joblib
+    import pandas as pd
+    from scoring import FEATURE_COLUMNS, add_features, score_frame
+
+    parser = argparse.ArgumentParser(description="Check fast-path parity and latency, and export its weights.")
+    parser.add_argument("--model", default="churn_model.pkl")
+    parser.add_argument("--export", action="store_true",
+                        help="on parity, write <model>.fast.json for pandas-free serving")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    scorer = LinearScorer.from_pipeline(model)
+
+    ok, report = check_parity(model, scorer)
+    for r in report:
+        print(f"{r['path']}: rows={r['rows']} max_abs_diff={r['max_abs_diff']:.3g} "
+              f"label_mismatches={r['label_mismatches']}")
+
+    records = pd.read_csv(BUNDLED_CSVS[0])[FEATURE_COLUMNS].head(200).to_dict("records")
+    sk_p50, sk_p99 = _latency_us(
+        lambda r: score_frame(model, add_features(pd.DataFrame([r]))), records, 500
+    )
+    fp_p50, fp_p99 = _latency_us(scorer.predict_one, records, 20000)
+    print(f"sklearn pipeline: p50={sk_p50:.1f}us p99={sk_p99:.1f}us")
+    print(f"fast path:        p50={fp_p50:.1f}us p99={fp_p99:.1f}us")
+
+    print("parity OK" if ok else "parity FAILED")
+    if ok and args.export:
+        scorer.save(scorer_path(args.model), args.model)
+        print(f"Wrote {scorer_path(args.model)}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
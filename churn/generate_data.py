@@ -0,0 +1,148 @@
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from columnar import is_columnar, write_columnar
+from score_file import open_sink
+
+# same value sets and churn-probability formula as the notebook generator
+GENDERS = np.array(["M", "F"], dtype=object)
+INCOME_LEVELS = np.array(["low", "medium", "high"], dtype=object)  # income_numeric 1..3
+SUB_PLANS = np.array(["basic", "standard", "premium"], dtype=object)  # sub_plan_numeric 1..3
+CONTRACTS = np.array(["monthly", "annual"], dtype=object)  # contract_numeric 1..2
+
+OUTLIER_RATE = 50 / 6000
+
+
+def generate_chunk(seed_seq, first_id, n, noise=False):
+    rng = np.random.default_rng(seed_seq)
+
+    age = rng.integers(18, 60, n)
+    gender = GENDERS[rng.integers(0, 2, n)]
+    tenure = rng.integers(1, 15, n)
+    failed_transaction = rng.integers(0, 2, n)
+    late_payment = rng.integers(0, 2, n)
+    auto_renewal = rng.integers(0, 2, n)
+    monthly_charge = rng.integers(50, 500, n)
+    income_numeric = rng.integers(0, 3, n) + 1
+    sub_plan_idx = rng.integers(0, 3, n)
+    contract_idx = rng.integers(0, 2, n)
+
+    sub_plan_numeric = sub_plan_idx + 1
+    contract_numeric = contract_idx + 1
+
+    risk_score = (
+        (60 - age) * 0.6 +
+        income_numeric * (-25) +
+        (15 - tenure) * 18 +
+        failed_transaction * 35 +
+        late_payment * 30 +
+        auto_renewal * (-20) +
+        contract_numeric * 15 +
+        (monthly_charge / 200) * 35 +
+        sub_plan_numeric * (-15)
+    )
+    default_probability = 1 / (1 + np.exp(-risk_score / 40))
+    default = rng.binomial(1, default_probability)
+
+    if noise:
+        # the notebook's post-label perturbation and monthly_charge outliers
+        age = age + rng.integers(-5, 20, n)
+        tenure = tenure + rng.integers(-2, 10, n)
+        monthly_charge = monthly_charge + rng.integers(-10, 10, n)
+        outliers = rng.random(n) < OUTLIER_RATE
+        monthly_charge[outliers] = rng.integers(1000, 5000, int(outliers.sum()))
+
+    return pd.DataFrame({
+        "customer_id": np.arange(first_id, first_id + n),
+        "age": age,
+        "gender": gender,
+        "income_numeric": income_numeric,
+        "tenure": tenure,
+        "sub_plan": SUB_PLANS[sub_plan_idx],
+        "contract": CONTRACTS[contract_idx],
+        "monthly_charge": monthly_charge,
+        "auto_renewal": auto_renewal,
+        "late_payment": late_payment,
+        "failed_transaction": failed_transaction,
+        "default": default
+    })
+
+
+def iter_generated(rows, seed=52, chunk_size=1_000_000, noise=False, workers=1):
+    # Chunk i always draws from child i of SeedSequence(seed), so the output is
+    # identical for any worker count. Chunks are yielded in order.
+    n_chunks = (rows + chunk_size - 1) // chunk_size
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    specs = [(seeds[i], i * chunk_size + 1, min(chunk_size, rows - i * chunk_size), noise)
+             for i in range(n_chunks)]
+
+    if workers <= 1:
+        for spec in specs:
+            yield generate_chunk(*spec)
+        return
+
+    pending = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        for spec in specs:
+            pending.append(pool.submit(generate_chunk, *spec))
+            while len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate(output, rows, seed=52, chunk_size=1_000_000, noise=False, workers=1, progress=None):
+    started = time.perf_counter()
+    written = 0
+
+    def counted(chunks):
+        nonlocal written
+        for chunk in chunks:
+            yield chunk
+            written += len(chunk)
+            if progress:
+                progress(written, time.perf_counter() - started)
+
+    chunks = counted(iter_generated(rows, seed, chunk_size, noise, workers))
+    if is_columnar(output):
+        write_columnar(chunks, output)
+    else:
+        sink = open_sink(output)
+        try:
+            for chunk in chunks:
+                sink.write(chunk)
+        finally:
+            sink.close()
+
+    return written, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic customer churn data at scale.")
+    parser.add_argument("output", help="output .csv, .parquet or .ccol file")
+    parser.add_argument("--rows", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=52)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--noise", action="store_true",
+                        help="apply the notebook's age/tenure/charge noise and charge outliers")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    def progress(rows, elapsed):
+        print(f"\r{rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s)",
+              end="", file=sys.stderr, flush=True)
+
+    rows, elapsed = generate(args.output, args.rows, args.seed, args.chunk_size,
+                             args.noise, args.workers, progress)
+    print(file=sys.stderr)
+    print(f"Wrote {rows:,} rows to {args.output} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
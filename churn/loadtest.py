@@ -0,0 +1,100 @@
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from scoring import FEATURE_COLUMNS
+
+
+def load_payloads(path, limit=1000):
+    df = pd.read_csv(path, nrows=limit)
+    return json.loads(df[FEATURE_COLUMNS].to_json(orient="records"))
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{base_url} did not become ready within {timeout}s")
+
+
+def run(base_url, payloads, concurrency, duration, path="/predict"):
+    url = f"{base_url}{path}"
+    stop_at = time.perf_counter() + duration
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(n):
+        session = requests.Session()
+        i = n
+        while time.perf_counter() < stop_at:
+            payload = payloads[i % len(payloads)]
+            i += concurrency
+            t = time.perf_counter()
+            try:
+                res = session.post(url, json=payload, timeout=10)
+                ok = res.status_code == 200 and "error" not in res.json()
+            except requests.RequestException:
+                ok = False
+            latencies[n].append(time.perf_counter() - t)
+            if not ok:
+                errors[n] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    samples = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0, 0, 0)
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": int(len(samples)),
+        "errors": int(sum(errors)),
+        "req_per_s": len(samples) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure req/s and latency percentiles of a running prediction API."
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--path", default="/predict")
+    parser.add_argument("--data", default="customer_data.csv")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    wait_ready(args.url)
+    result = run(args.url, load_payloads(args.data), args.concurrency, args.duration, args.path)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['url']}  concurrency={result['concurrency']}")
+        print(f"  {result['requests']:,} requests, {result['errors']:,} errors, "
+              f"{result['req_per_s']:,.0f} req/s")
+        print(f"  p50={result['p50_ms']:.2f}ms  p95={result['p95_ms']:.2f}ms  "
+              f"p99={result['p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
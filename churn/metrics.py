@@ -0,0 +1,164 @@
+import bisect
+import json
+import logging
+import threading
+import time
+
+# Minimal Prometheus text-format metrics. Every observation is a dict lookup
+# and a couple of additions under a lock, cheap enough to leave on in
+# production. Values are per process: under serve.py each worker reports its own.
+
+LATENCY_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+slow_log = logging.getLogger("churn.slow_requests")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, (counts, total, n) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {n}")
+        return lines
+
+
+REQUESTS = Counter("churn_requests_total", "HTTP requests by endpoint and status code.",
+                   ("endpoint", "status"))
+ERRORS = Counter("churn_request_errors_total", "Failed requests by endpoint and error kind.",
+                 ("endpoint", "kind"))
+LATENCY = Histogram("churn_request_duration_seconds", "End-to-end request latency.",
+                    ("endpoint",))
+STAGES = Histogram("churn_stage_duration_seconds", "Per-stage request latency.",
+                   ("endpoint", "stage"))
+ROWS = Counter("churn_scored_rows_total", "Customers scored, by endpoint.", ("endpoint",))
+
+METRICS = [REQUESTS, ERRORS, LATENCY, STAGES, ROWS]
+_collectors = []
+
+
+def add_collector(fn):
+    # fn() -> iterable of (name, type, help, value) for gauges/counters owned elsewhere
+    _collectors.append(fn)
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        for name, kind, help, value in fn():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.stages[self.name] = self.timer.stages.get(self.name, 0.0) + \
+            time.perf_counter() - self.started
+
+
+class RequestTimer:
+    def __init__(self, endpoint, slow_after=None):
+        self.endpoint = endpoint
+        self.slow_after = slow_after
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def finish(self, status, payload=None):
+        elapsed = time.perf_counter() - self.started
+        REQUESTS.inc(self.endpoint, status)
+        LATENCY.observe(elapsed, self.endpoint)
+        for name, seconds in self.stages.items():
+            STAGES.observe(seconds, self.endpoint, name)
+
+        if self.slow_after is not None and elapsed >= self.slow_after:
+            # payload may be a callable so the body is only read for slow requests
+            body = payload() if callable(payload) else payload
+            body = body if isinstance(body, str) else json.dumps(body, default=str)
+            slow_log.warning(
+                "slow request endpoint=%s status=%s total_ms=%.2f stages=%s payload=%s",
+                self.endpoint, status, elapsed * 1000,
+                {k: round(v * 1000, 3) for k, v in self.stages.items()},
+                body[:2048]
+            )
+        return elapsed
+
+
+def no_stage(name):
+    return _NULL_STAGE
+
+
+class _NullStage:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_STAGE = _NullStage()
@@ -1,9 +1,39 @@
 import streamlit as st
-import requests
-import plotly.graph_objects as go
 
 st.set_page_config(layout="wide")
 
+TOP_DRIVERS = 3
+PLANS = ["basic", "standard", "premium"]
+CONTRACTS = ["monthly", "annual"]
+WHATIF_STEPS = 100
+WHATIF_CHANGES = {
+    "contract": lambda v: f"switch to the **{v}** contract",
+    "sub_plan": lambda v: f"move to the **{v}** plan",
+    "auto_renewal": lambda v: "turn auto-renewal **on**" if v else "turn auto-renewal **off**",
+    "monthly_charge": lambda v: f"charge **${v}**/month"
+}
+
+
+@st.cache_resource
+def get_api():
+    # one pooled keep-alive client per Streamlit server, shared across reruns
+    from api_client import ChurnClient
+    return ChurnClient()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_decision(model_version):
+    # threshold and risk bands of the version that scored the customer
+    return get_api().decision(model_version)
+
+
+BAND_CARDS = {
+    "high": ("#fff7f7", "#ef4444", "⚠️ HIGH RISK", "Customer shows strong patterns of potential churn."),
+    "medium": ("#fffbeb", "#eab308", "👀 MEDIUM RISK", "Customer is on the watch list: below the action threshold, but among the likely churners."),
+    "low": ("#f6fff9", "#22c55e", "✅ LOW RISK", "Customer is likely to remain loyal to the service.")
+}
+
+
 # ---------- STYLE ----------
 st.markdown("""
 <style>
@@ -55,10 +85,10 @@ with st.container():
         gender = st.selectbox("Gender", ["M", "F"])
         income_numeric = st.selectbox("Income Level", [1, 2, 3], help="1: Low, 2: Medium, 3: High")
         tenure = st.number_input("Tenure (Months)", 1, 120, 5)
-        sub_plan = st.selectbox("Subscription Plan", ["basic", "standard", "premium"])
+        sub_plan = st.selectbox("Subscription Plan", PLANS)
         
     with col2:
-        contract = st.selectbox("Contract Type", ["monthly", "annual"])
+        contract = st.selectbox("Contract Type", CONTRACTS)
         monthly_charge = st.number_input("Monthly Charge ($)", 10, 1000, 100)
         auto_renewal = st.selectbox("Auto Renewal", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
         late_payment = st.selectbox("Late Payment History", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
@@ -69,31 +99,44 @@ with st.container():
     st.markdown("</div>", unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+payload = {
+    "age": age,
+    "gender": gender,
+    "income_numeric": income_numeric,
+    "tenure": tenure,
+    "sub_plan": sub_plan,
+    "contract": contract,
+    "monthly_charge": monthly_charge,
+    "auto_renewal": auto_renewal,
+    "late_payment": late_payment,
+    "failed_transaction": failed_transaction
+}
+
 # ---------- RESULT ----------
 if predict:
-    with st.spinner("Processing customer profile through AI engine..."):
-        payload = {
-            "age": age,
-            "gender": gender,
-            "income_numeric": income_numeric,
-            "tenure": tenure,
-            "sub_plan": sub_plan,
-            "contract": contract,
-            "monthly_charge": monthly_charge,
-            "auto_renewal": auto_renewal,
-            "late_payment": late_payment,
-            "failed_transaction": failed_transaction
-        }
+    # imported on first use so the form renders without waiting on them
+    import plotly.graph_objects as go
+    from api_client import ApiError, ApiUnavailable
+    from schema import FEATURE_LABELS
 
+    with st.spinner("Processing customer profile through AI engine..."):
         try:
-            res = requests.post("http://127.0.0.1:5000/predict", json=payload).json()
-            
-            if "prediction" not in res:
-                st.error(f"API Error: {res}")
-                st.stop()
+            res = get_api().predict(payload, explain=TOP_DRIVERS)
 
             pred = res["prediction"]
             prob = res["probability"]
+            band = res["risk_band"]
+            # None when the served model has no exact drivers (non-linear)
+            drivers = res.get("explanation") or []
+            decision = get_decision(res["model_version"])
+            medium, high = decision["bands"]["medium"] * 100, decision["bands"]["high"] * 100
+
+            # the Result page reads these
+            st.session_state["prediction"] = pred
+            st.session_state["probability"] = prob
+            st.session_state["risk_band"] = band
+            st.session_state["decision"] = decision
+            st.session_state["explanation"] = drivers
 
             st.markdown("<div class='result-card'>", unsafe_allow_html=True)
             st.subheader("🎯 Analysis Results")
@@ -112,14 +155,14 @@ if predict:
                         'borderwidth': 2,
                         'bordercolor': "#334155",
                         'steps': [
-                            {'range': [0, 30], 'color': 'rgba(34, 197, 94, 0.2)'},
-                            {'range': [30, 70], 'color': 'rgba(234, 179, 8, 0.2)'},
-                            {'range': [70, 100], 'color': 'rgba(239, 68, 68, 0.2)'}
+                            {'range': [0, medium], 'color': 'rgba(34, 197, 94, 0.2)'},
+                            {'range': [medium, high], 'color': 'rgba(234, 179, 8, 0.2)'},
+                            {'range': [high, 100], 'color': 'rgba(239, 68, 68, 0.2)'}
                         ],
                         'threshold': {
                             'line': {'color': "red", 'width': 4},
                             'thickness': 0.75,
-                            'value': 70
+                            'value': high
                         }
                     }
                 ))
@@ -134,23 +177,133 @@ if predict:
 
             with res_col2:
                 st.markdown("<br><br>", unsafe_allow_html=True)
-                if pred == 1:
-                    st.markdown("""
-                    <div style='background: #fff7f7; padding: 18px; border-radius: 14px; border: 1px solid #ef4444;'>
-                        <h3 style='color: #ef4444; margin:0;'>⚠️ HIGH RISK</h3>
-                        <p style='color: #0f172a; margin-top:10px;'>Customer shows strong patterns of potential churn.</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown("""
-                    <div style='background: #f6fff9; padding: 18px; border-radius: 14px; border: 1px solid #22c55e;'>
-                        <h3 style='color: #22c55e; margin:0;'>✅ LOW RISK</h3>
-                        <p style='color: #0f172a; margin-top:10px;'>Customer is likely to remain loyal to the service.</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
+                background, color, title, text = BAND_CARDS[band]
+                st.markdown(f"""
+                <div style='background: {background}; padding: 18px; border-radius: 14px; border: 1px solid {color};'>
+                    <h3 style='color: {color}; margin:0;'>{title}</h3>
+                    <p style='color: #0f172a; margin-top:10px;'>{text}</p>
+                </div>
+                """, unsafe_allow_html=True)
+                st.caption(f"Action threshold {decision['threshold']:.0%}")
+
+            st.subheader("🔎 Top Risk Drivers")
+            if not drivers:
+                st.caption("Risk drivers are only available for linear models.")
+            for d in drivers:
+                direction = "raises" if d["contribution"] > 0 else "lowers"
+                color = "#ef4444" if d["contribution"] > 0 else "#22c55e"
+                st.markdown(
+                    f"**{FEATURE_LABELS.get(d['feature'], d['feature'])}** = `{d['value']}` "
+                    f"<span style='color:{color};'>{direction} risk ({d['contribution']:+.2f} log-odds)</span>",
+                    unsafe_allow_html=True
+                )
+
             st.markdown("</div>", unsafe_allow_html=True)
             st.balloons()
 
-        except Exception as e:
+        except ApiUnavailable as e:
             st.error(f"Connection Error: Ensure the prediction engine is running. ({str(e)})")
+
+        except ApiError as e:
+            st.error(f"API Error: {e}")
+
+
+# ---------- WHAT-IF ----------
+def whatif_heatmap(result, customer):
+    import numpy as np
+    import plotly.graph_objects as go
+
+    # the API returns probabilities in C order over result["levers"]; put
+    # them in contract x plan x auto-renewal x charge order, one heatmap row
+    # per contract/plan/renewal combination
+    order = ["contract", "sub_plan", "auto_renewal", "monthly_charge"]
+    values = result["values"]
+    probs = np.asarray(result["probabilities"]).reshape(result["shape"])
+    probs = np.transpose(probs, [result["levers"].index(k) for k in order])
+    charges = values["monthly_charge"]
+    z = probs.reshape(-1, len(charges)) * 100
+
+    def row_label(contract, plan, renewal):
+        return f"{contract} · {plan} · {'auto-renew' if renewal else 'no auto-renew'}"
+
+    rows = [row_label(c, p, r) for c in values["contract"] for p in values["sub_plan"]
+            for r in values["auto_renewal"]]
+
+    fig = go.Figure(go.Heatmap(
+        x=charges, y=rows, z=z, zmin=0, zmax=100, colorscale="RdYlGn_r",
+        colorbar={"title": "Churn %"},
+        hovertemplate="%{y}<br>$%{x}/month<br>churn %{z:.1f}%<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[customer["monthly_charge"]],
+        y=[row_label(customer["contract"], customer["sub_plan"], customer["auto_renewal"])],
+        mode="markers", name="Current",
+        marker={"symbol": "circle-open", "size": 16, "color": "#0f172a", "line": {"width": 3}}
+    ))
+    best = result["best"]
+    if best is not None:
+        idx = np.unravel_index(best["index"], result["shape"])
+        at = {k: values[k][i] for k, i in zip(result["levers"], idx)}
+        fig.add_trace(go.Scatter(
+            x=[at["monthly_charge"]],
+            y=[row_label(at["contract"], at["sub_plan"], at["auto_renewal"])],
+            mode="markers", name="Cheapest change",
+            marker={"symbol": "star", "size": 20, "color": "#6366f1", "line": {"width": 2, "color": "#ffffff"}}
+        ))
+    fig.update_layout(
+        paper_bgcolor="#ffffff",
+        plot_bgcolor="#ffffff",
+        height=max(300, 32 * len(rows) + 120),
+        margin=dict(l=20, r=20, t=30, b=20),
+        xaxis_title="Monthly Charge ($)",
+        legend={"orientation": "h", "y": 1.08}
+    )
+    return fig
+
+
+st.markdown("<div class='result-card'>", unsafe_allow_html=True)
+st.subheader("🧪 What-if Explorer")
+st.caption("Scores every contract × plan × auto-renewal × monthly charge variant of this customer "
+           "in one batched call and marks the cheapest change that lowers their risk.")
+
+low, high = max(10, monthly_charge // 2), min(1000, monthly_charge * 2)
+wi_col1, wi_col2 = st.columns(2)
+charge_range = wi_col1.slider("Monthly charge range ($)", 10, 1000, (low, high))
+steps = wi_col2.slider("Charge steps", 10, 200, WHATIF_STEPS)
+
+if st.button("Run What-if Sweep", use_container_width=True):
+    import numpy as np
+    from api_client import ApiError, ApiUnavailable
+
+    charges = np.linspace(charge_range[0], charge_range[1], steps).round()
+    grid = {
+        "contract": CONTRACTS,
+        "sub_plan": PLANS,
+        "auto_renewal": [0, 1],
+        # the current charge is always on the grid so "no price change" is a variant
+        "monthly_charge": sorted({int(c) for c in charges} | {int(monthly_charge)})
+    }
+    try:
+        with st.spinner("Scoring the what-if grid..."):
+            st.session_state["whatif"] = {"customer": dict(payload), "result": get_api().whatif(payload, grid)}
+    except ApiUnavailable as e:
+        st.error(f"Connection Error: Ensure the prediction engine is running. ({str(e)})")
+    except ApiError as e:
+        st.error(f"API Error: {e}")
+
+whatif = st.session_state.get("whatif")
+if whatif is not None and whatif["customer"] != payload:
+    st.info("The profile changed since the last sweep; run it again to update the surface.")
+elif whatif is not None:
+    result = whatif["result"]
+    base, best = result["baseline"], result["best"]
+    st.plotly_chart(whatif_heatmap(result, payload), use_container_width=True)
+    st.caption(f"{len(result['probabilities']):,} variants · current risk {base['probability']:.1%} "
+               f"({base['risk_band']}) · action threshold {result['threshold']:.0%}")
+    if best is None:
+        st.warning("No variant on this grid lowers the churn risk by at least one point.")
+    else:
+        changes = ", ".join(WHATIF_CHANGES[k](v) for k, v in best["changes"].items())
+        st.success(f"Cheapest risk-reducing change: {changes} — churn risk {base['probability']:.1%} → "
+                   f"{best['probability']:.1%} ({best['risk_band']} risk)")
+st.markdown("</div>", unsafe_allow_html=True)
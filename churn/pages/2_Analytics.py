@@ -1,9 +1,267 @@
+import hashlib
+import os
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+
+from aggregates import grouped_box_summary, histogram
+from columnar import read_table
+from cube import DIMENSIONS, SUFFIX as CUBE_SUFFIX, SegmentCube
 
 st.set_page_config(layout="wide")
 
+# raw point rendering ships every row to the browser, so it is only offered
+# for small files; larger ones are always drawn from server-side summaries
+RAW_RENDER_LIMIT = 50_000
+CHURN_COLORS = {0: "#22c55e", 1: "#ef4444"}
+# segment cubes are kept on disk by content hash, so a restarted server
+# reloads them instead of re-aggregating the upload
+CUBE_DIR = os.environ.get("CHURN_CUBE_DIR", ".cubes")
+DIMENSION_LABELS = {
+    "sub_plan": "Subscription Plan",
+    "contract": "Contract",
+    "gender": "Gender",
+    "income_numeric": "Income Level",
+    "auto_renewal": "Auto Renewal",
+    "late_payment": "Late Payment",
+    "tenure_bucket": "Tenure (months)",
+    "age_bucket": "Age"
+}
+
+
+# ---------- CACHED DATA LAYER (keyed by the upload's content hash) ----------
+def content_hash(file):
+    # hash each upload once; reruns reuse the digest stored for its file_id
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if file.file_id not in hashes:
+        hashes[file.file_id] = hashlib.blake2b(file.getvalue(), digest_size=16).hexdigest()
+    return hashes[file.file_id]
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_dataset(digest, _file):
+    # shared, read-only frame: cache_resource avoids copying it on every rerun
+    # .ccol uploads are viewed in place over the upload buffer, CSVs are parsed
+    return read_table(_file, _file.name)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def churn_kpis(digest, _df):
+    total = len(_df)
+    churn = int(_df["default"].sum())
+    counts = _df["default"].value_counts()
+    return {
+        "total": total,
+        "churn": churn,
+        "rate": churn / total * 100 if total else 0.0,
+        "status_counts": {int(k): int(v) for k, v in counts.items()}
+    }
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def tenure_bins(digest, _df):
+    return histogram(_df["tenure"].to_numpy(), nbins=30)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def charge_boxes(digest, _df):
+    return grouped_box_summary(_df["monthly_charge"].to_numpy(), _df["default"].to_numpy())
+
+
+def tenure_histogram(digest, df, raw):
+    # plotly is imported on first use so the upload widget renders without it
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if raw:
+        fig = px.histogram(
+            df, x="tenure", nbins=30,
+            color_discrete_sequence=["#22d3ee"],
+            title="<b>Tenure Distribution</b>"
+        )
+    else:
+        bins = tenure_bins(digest, df)
+        edges = bins["edges"]
+        fig = go.Figure(go.Bar(
+            x=[(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+            y=bins["counts"],
+            width=[hi - lo for lo, hi in zip(edges[:-1], edges[1:])],
+            marker_color="#22d3ee"
+        ))
+        fig.update_layout(title="<b>Tenure Distribution</b>", bargap=0)
+    fig.update_layout(
+        paper_bgcolor='#ffffff',
+        plot_bgcolor='#ffffff',
+        template="plotly_white",
+        xaxis_title="Months with Service",
+        yaxis_title="Customer Count"
+    )
+    return fig
+
+
+def charge_box(digest, df, raw):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if raw:
+        fig = px.box(
+            df, x="default", y="monthly_charge",
+            color="default",
+            color_discrete_map=CHURN_COLORS,
+            labels={"default": "Churn Status", "monthly_charge": "Monthly Charge ($)"},
+            title="<b>Monthly Charge Correlation with Churn</b>"
+        )
+    else:
+        fig = go.Figure()
+        for status, box in charge_boxes(digest, df).items():
+            if box is None:
+                continue
+            color = CHURN_COLORS.get(status, "#64748b")
+            fig.add_trace(go.Box(
+                name=str(status), x=[status],
+                q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]],
+                lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]],
+                mean=[box["mean"]],
+                marker_color=color, boxpoints=False
+            ))
+            # sampled outliers only; n_outliers holds the true count
+            fig.add_trace(go.Scatter(
+                x=[status] * len(box["outliers"]), y=box["outliers"],
+                mode="markers", marker=dict(color=color, size=4),
+                name=f"{status} outliers ({box['n_outliers']:,})", showlegend=False
+            ))
+        fig.update_layout(
+            title="<b>Monthly Charge Correlation with Churn</b>",
+            xaxis_title="Churn Status",
+            yaxis_title="Monthly Charge ($)",
+            legend_title_text="default"
+        )
+    fig.update_layout(
+        paper_bgcolor='#ffffff',
+        plot_bgcolor='#ffffff',
+        template="plotly_white"
+    )
+    return fig
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def segment_cube(digest, _df):
+    # one aggregation pass per dataset; every filter change is a cube slice
+    path = os.path.join(CUBE_DIR, digest + CUBE_SUFFIX)
+    if os.path.exists(path):
+        cube = SegmentCube.load(path)
+        # cubes from before the per-measure denominators are rebuilt
+        if "charged" in cube.measures:
+            return cube
+    # scored files (e.g. a Bulk page download) also get mean predicted risk
+    probabilities = _df["churn_probability"] if "churn_probability" in _df.columns else None
+    cube = SegmentCube.from_frame(_df, probabilities=probabilities)
+    os.makedirs(CUBE_DIR, exist_ok=True)
+    cube.save(path)
+    return cube
+
+
+def segment_explorer(cube):
+    import plotly.express as px
+
+    st.subheader("🧊 Segment Explorer")
+    filters = {}
+    for row in (DIMENSIONS[:4], DIMENSIONS[4:]):
+        for col, dim in zip(st.columns(len(row)), row):
+            with col:
+                filters[dim] = st.multiselect(DIMENSION_LABELS[dim], cube.levels[dim],
+                                              placeholder="All", key=f"cube_{dim}")
+    by = st.multiselect("Break down by", DIMENSIONS, default=["sub_plan"], max_selections=2,
+                        format_func=DIMENSION_LABELS.get, key="cube_by")
+
+    overall = cube.query(filters)
+    if overall.empty:
+        st.info("No customers match these filters.")
+        return
+    total = overall.iloc[0]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Customers in Segment", f"{int(total['count']):,}")
+    if "churn_rate" in overall:
+        c2.metric("Segment Churn Rate", f"{total['churn_rate'] * 100:.2f}%")
+    c3.metric("Mean Monthly Charge", f"${total['mean_charge']:,.2f}")
+
+    if not by:
+        return
+    table = cube.query(filters, by)
+    rate = "churn_rate" if "churn_rate" in table else "mean_probability"
+    if rate in table:
+        fig = px.bar(
+            table, x=by[0], y=rate, color=by[1] if len(by) > 1 else None, barmode="group",
+            hover_data=["count", "mean_charge"],
+            labels={**DIMENSION_LABELS, "churn_rate": "Churn Rate", "mean_probability": "Mean Predicted Risk"},
+            title="<b>Churn Rate by Segment</b>"
+        )
+        fig.update_layout(
+            paper_bgcolor='#ffffff',
+            plot_bgcolor='#ffffff',
+            template="plotly_white",
+            yaxis_tickformat=".0%"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(table.rename(columns=DIMENSION_LABELS), use_container_width=True, hide_index=True)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def upload_drift(digest, _df):
+    # the upload replayed through a DriftMonitor as one window against the
+    # serving model's training profile; None when no profile is available
+    from drift import DriftMonitor, load_profile, profile_path
+    from schema import FEATURE_COLUMNS
+
+    profile = load_profile(profile_path("churn_model.pkl"))
+    if profile is None:
+        return None
+    monitor = DriftMonitor(profile, window=max(len(_df), 1))
+    monitor.observe_frame(_df[[c for c in FEATURE_COLUMNS if c in _df.columns]])
+    report = monitor.report()
+    # the upload has no model scores, so the probability row stays empty
+    report["features"].pop("probability", None)
+    return report
+
+
+@st.cache_resource
+def get_api():
+    # one pooled keep-alive client per Streamlit server, shared across reruns
+    from api_client import ChurnClient
+    return ChurnClient()
+
+
+DRIFT_COLORS = {"ok": "#22c55e", "warn": "#f59e0b", "alert": "#ef4444", "too few rows": "#cbd5e1", "no data": "#94a3b8"}
+
+
+def drift_chart(report, title):
+    import plotly.graph_objects as go
+    from schema import FEATURE_LABELS
+
+    rows = [(FEATURE_LABELS.get(name, name.replace("_", " ").title()), f["psi"] or 0.0, f["status"])
+            for name, f in report["features"].items()]
+    rows.sort(key=lambda r: r[1])
+    fig = go.Figure(go.Bar(
+        x=[r[1] for r in rows], y=[r[0] for r in rows], orientation="h",
+        marker_color=[DRIFT_COLORS[r[2]] for r in rows],
+        text=[f"{r[1]:.3f}" for r in rows], textposition="outside"
+    ))
+    fig.update_layout(
+        title=f"<b>{title}</b>",
+        xaxis_title="Population Stability Index (0.1 warn, 0.25 alert)",
+        paper_bgcolor='#ffffff',
+        plot_bgcolor='#ffffff',
+        template="plotly_white",
+        height=420
+    )
+    return fig
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def report_csv(digest, _df):
+    return _df.to_csv(index=False).encode()
+
+
 # ---------- STYLE ----------
 st.markdown("""
 <style>
@@ -30,16 +288,18 @@ st.markdown("""
 
 st.markdown("<h1 class='main-header'>Analytics Intelligence Dashboard</h1>", unsafe_allow_html=True)
 
-file = st.file_uploader("Upload dataset to initialize analysis", type=["csv"])
+file = st.file_uploader("Upload dataset to initialize analysis", type=["csv", "ccol"])
 
 if file:
     with st.spinner("Generating intelligence reports..."):
-        df = pd.read_csv(file)
+        digest = content_hash(file)
+        df = load_dataset(digest, file)
 
         # ---------- KPI ----------
-        total = len(df)
-        churn = df["default"].sum()
-        rate = churn / total * 100
+        kpis = churn_kpis(digest, df)
+        total = kpis["total"]
+        churn = kpis["churn"]
+        rate = kpis["rate"]
 
         c1, c2, c3 = st.columns(3)
         with c1:
@@ -51,13 +311,24 @@ if file:
 
         st.markdown("<br>", unsafe_allow_html=True)
 
+        raw = st.toggle(
+            "Render raw data points",
+            value=False,
+            disabled=total > RAW_RENDER_LIMIT,
+            help=f"Only available for files up to {RAW_RENDER_LIMIT:,} rows; "
+                 "larger files are charted from server-side summaries."
+        ) and total <= RAW_RENDER_LIMIT
+
         # ---------- CHARTS ----------
+        import plotly.express as px
+
         col_left, col_right = st.columns(2)
 
         with col_left:
             st.markdown("<div class='chart-card'>", unsafe_allow_html=True)
-            chart_data = df["default"].value_counts().reset_index()
-            chart_data.columns = ["Status", "Count"]
+            chart_data = pd.DataFrame(
+                list(kpis["status_counts"].items()), columns=["Status", "Count"]
+            )
             chart_data["Status"] = chart_data["Status"].map({0: "Retained", 1: "Churned"})
             
             fig1 = px.pie(
@@ -78,39 +349,58 @@ if file:
 
         with col_right:
             st.markdown("<div class='chart-card'>", unsafe_allow_html=True)
-            fig2 = px.histogram(
-                df, x="tenure", nbins=30,
-                color_discrete_sequence=["#22d3ee"],
-                title="<b>Tenure Distribution</b>"
-            )
-            fig2.update_layout(
-                paper_bgcolor='#ffffff',
-                plot_bgcolor='#ffffff',
-                template="plotly_white",
-                xaxis_title="Months with Service",
-                yaxis_title="Customer Count"
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(tenure_histogram(digest, df, raw), use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
         st.markdown("<div class='chart-card'>", unsafe_allow_html=True)
-        fig3 = px.box(
-            df, x="default", y="monthly_charge",
-            color="default",
-            color_discrete_map={0: "#22c55e", 1: "#ef4444"},
-            labels={"default": "Churn Status", "monthly_charge": "Monthly Charge ($)"},
-            title="<b>Monthly Charge Correlation with Churn</b>"
-        )
-        fig3.update_layout(
-            paper_bgcolor='#ffffff',
-            plot_bgcolor='#ffffff',
-            template="plotly_white"
-        )
-        st.plotly_chart(fig3, use_container_width=True)
+        st.plotly_chart(charge_box(digest, df, raw), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # ---------- DOWNLOAD ----------
-        csv = df.to_csv(index=False).encode()
+        # ---------- SEGMENTS ----------
+        required = {"sub_plan", "contract", "gender", "income_numeric", "auto_renewal",
+                    "late_payment", "tenure", "age", "monthly_charge"}
+        if required <= set(df.columns):
+            st.markdown("<div class='chart-card'>", unsafe_allow_html=True)
+            segment_explorer(segment_cube(digest, df))
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        # ---------- DRIFT ----------
+        drift_report = upload_drift(digest, df)
+        if drift_report is not None:
+            st.markdown("<div class='chart-card'>", unsafe_allow_html=True)
+            st.plotly_chart(drift_chart(drift_report, "Upload vs Training Distribution"),
+                            use_container_width=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    with st.expander("📡 Live API drift"):
+        # fetched on demand: expander bodies run on every rerun, open or not
+        if st.button("Fetch live drift from the API", key="refresh_drift"):
+            from api_client import ApiError
+
+            try:
+                st.session_state["live_drift"] = get_api().drift()
+            except ApiError as e:
+                st.session_state["live_drift"] = None
+                st.info(f"Live drift is unavailable: {e}")
+        live = st.session_state.get("live_drift")
+        if live:
+            st.caption(f"{live['observations']:,} requests observed, "
+                       f"{live['windows']} windows of {live['window_size']:,}")
+            if live["alerts"]:
+                st.warning("Drift alert in the latest window: " + ", ".join(live["alerts"]))
+            st.plotly_chart(drift_chart(live, "Serving Traffic vs Training Distribution"),
+                            use_container_width=True)
+
+    # ---------- DOWNLOAD ----------
+    # the CSV is only serialized once the user asks for it
+    export_key = f"export_{digest}"
+    if not st.session_state.get(export_key):
+        if st.button("📥 Prepare Full Intelligence Report", use_container_width=True):
+            st.session_state[export_key] = True
+            st.rerun()
+    else:
+        with st.spinner("Preparing export..."):
+            csv = report_csv(digest, df)
         st.download_button(
             "📥 Export Full Intelligence Report",
             csv,
@@ -120,5 +410,5 @@ if file:
         )
 
 else:
-    st.info("👋 Please upload a customer dataset (CSV) to begin the analysis.")
+    st.info("👋 Please upload a customer dataset (CSV or .ccol) to begin the analysis.")
     st.image("https://images.unsplash.com/photo-1551288049-bbbda540d3b9?auto=format&fit=crop&q=80&w=1000", caption="Global Churn Analytics")
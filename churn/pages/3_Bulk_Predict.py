@@ -1,10 +1,93 @@
+import time
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-import requests
-import plotly.express as px
+
+from aggregates import top_k
+from columnar import is_columnar, read_columnar
+from excel import excel_info, is_excel, iter_excel
+from scoring import score_chunks
+from threshold import load_decision, risk_bands
 
 st.set_page_config(layout="wide")
 
+CHUNK_SIZE = 50_000
+API_CHUNK_SIZE = 5_000
+API_WORKERS = 4
+TOP_K = 1_000
+PAGE_SIZES = [25, 50, 100]
+
+
+@st.cache_resource
+def load_model():
+    import joblib
+    return joblib.load("churn_model.pkl")
+
+
+def top_drivers(model, df, k=3):
+    # "Feature (+0.84), ..." per row from one vectorized explain_rows call
+    from explain import explain_rows
+    from schema import FEATURE_LABELS
+
+    _, _, names, values = explain_rows(model, df, k)
+    return [
+        ", ".join(f"{FEATURE_LABELS.get(n, n)} ({v:+.2f})" for n, v in zip(row_n, row_v) if n is not None)
+        for row_n, row_v in zip(names.tolist(), values.tolist())
+    ]
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def read_upload(file_id, _file):
+    # parsed once per upload: paging and toggles rerun the script, not the read
+    if is_columnar(_file.name):
+        return read_columnar(_file)
+    return pd.read_csv(_file)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def upload_info(file_id, _file):
+    # Excel uploads are not parsed up front: schema, row count and preview
+    # come from the first rows, and the sheet is streamed when scoring starts
+    return excel_info(_file)
+
+
+def stream_scores(frames, score, parts):
+    # (start, stop, predictions, probabilities) across a sequence of frames,
+    # each scored as soon as it is parsed; parts collects the frames
+    offset = 0
+    for frame in frames:
+        parts.append(frame)
+        for start, stop, pred, prob in score(frame):
+            yield offset + start, offset + stop, pred, prob
+        offset += len(frame)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def call_list(run, _probabilities, k):
+    # row positions of the k most likely churners, highest first (partial
+    # selection, no full sort); ties keep file order so pages never shuffle
+    return top_k(_probabilities, k)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def call_list_csv(run, _df, k):
+    ranked = call_list(run, _df["churn_probability"].to_numpy(), k)
+    out = _df.iloc[ranked]
+    return out.assign(rank=np.arange(1, len(out) + 1)).to_csv(index=False).encode()
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def results_csv(run, _df):
+    return _df.to_csv(index=False).encode()
+
+
+@st.cache_resource
+def get_api():
+    # one pooled keep-alive client per Streamlit server, shared across reruns
+    from api_client import ChurnClient
+    return ChurnClient()
+
 # ---------- STYLE ----------
 st.markdown("""
 <style>
@@ -38,80 +121,108 @@ st.markdown("""
 
 st.markdown("<h1 class='main-header'>Bulk Processing Engine</h1>", unsafe_allow_html=True)
 
-file = st.file_uploader("Upload customer batch file", type=["csv", "xlsx"])
+file = st.file_uploader("Upload customer batch file", type=["csv", "xlsx", "ccol"])
 
 if file is not None:
-    # read file
-    if file.name.endswith(".csv"):
-        df = pd.read_csv(file)
+    excel = is_excel(file.name)
+    if excel:
+        info = upload_info(file.file_id, file)
+        total, preview = info["rows"], info["preview"]
     else:
-        df = pd.read_excel(file)
+        df = read_upload(file.file_id, file)
+        total, preview = len(df), df.head(10)
 
     st.markdown(f"""
     <div class='status-card'>
         <h4 style='margin:0; color:#22d3ee;'>Batch Metadata</h4>
-        <p style='margin:5px 0 0 0; color:#94a3b8;'>File: {file.name} | Records: {len(df)}</p>
+        <p style='margin:5px 0 0 0; color:#94a3b8;'>File: {file.name} | Records: {total:,}</p>
     </div>
     """, unsafe_allow_html=True)
+
+    if excel:
+        with st.expander(f"🧾 Sheet Schema ({info['sheet']})"):
+            st.dataframe(pd.DataFrame(info["columns"]), use_container_width=True, hide_index=True)
     
     with st.expander("🔍 Preview Raw Data"):
-        st.dataframe(df.head(10), use_container_width=True)
-
-    # fast demo limit
-    process_df = df.head(200).copy()
+        st.dataframe(preview, use_container_width=True)
 
     st.markdown("---")
+    via_api = st.toggle(
+        "Score through the prediction API",
+        help="Send the file to the running API in concurrent /predict/batch calls "
+             "instead of scoring it in this process."
+    )
     if st.button("🚀 Execute Neural Analysis", use_container_width=True):
-        preds = []
-        total = len(process_df)
-        
         progress_bar = st.progress(0)
         status_text = st.empty()
 
-        for i, (_, row) in enumerate(process_df.iterrows()):
-            status_text.text(f"Processing record {i+1} of {total}...")
-            
-            payload = {
-                "age": row["age"],
-                "gender": row["gender"],
-                "income_numeric": row["income_numeric"],
-                "tenure": row["tenure"],
-                "sub_plan": row["sub_plan"],
-                "contract": row["contract"],
-                "monthly_charge": row["monthly_charge"],
-                "auto_renewal": row["auto_renewal"],
-                "late_payment": row["late_payment"],
-                "failed_transaction": row["failed_transaction"]
-            }
+        # generators: nothing is parsed or scored until the loop below; labels
+        # and bands use the scoring model's tuned decision (see threshold.py)
+        frames = iter_excel(file, CHUNK_SIZE) if excel else [df]
+        if via_api:
+            api = get_api()
+            decision = api.decision()
+            score = lambda frame: api.score_chunks(frame, API_CHUNK_SIZE, API_WORKERS)
+        else:
+            model = load_model()
+            decision = load_decision("churn_model.pkl")
+            score = lambda frame: score_chunks(model, frame, CHUNK_SIZE)
+        parts, scored = [], []
+        started = time.perf_counter()
 
-            try:
-                res = requests.post(
-                    "http://127.0.0.1:5000/predict",
-                    json=payload
-                ).json()
-                preds.append(res.get("prediction", None))
-            except:
-                preds.append(None)
+        try:
+            for start, stop, pred, prob in stream_scores(frames, score, parts):
+                scored.append(np.asarray(prob, dtype=float))
+                status_text.text(f"Processed {stop:,} of {total:,} records...")
+                progress_bar.progress(min(stop / max(total, 1), 1.0))
+        except Exception as e:
+            status_text.error(f"Scoring failed after {sum(len(s) for s in scored):,} records: {e}")
+            st.stop()
 
-            progress_bar.progress((i + 1) / total)
+        process_df = pd.concat(parts, ignore_index=True) if excel else df
+        probs = np.concatenate(scored) if scored else np.empty(0)
+        total = len(process_df)
+        elapsed = time.perf_counter() - started
+        preds = np.where(np.isnan(probs), np.nan, probs >= decision["threshold"])
+        # the cached upload stays untouched; results live in the session so
+        # paging through them reruns the script without rescoring
+        st.session_state["bulk_run"] = {
+            "file_id": file.file_id,
+            "run": f"{file.file_id}-{started}",
+            "decision": decision,
+            "df": process_df.assign(
+                churn_prediction=pd.array(preds, dtype="Float64").astype("Int64"),
+                churn_probability=probs,
+                risk_band=risk_bands(probs, decision)
+            )
+        }
+        status_text.success(
+            f"Analysis complete for {total:,} records in {elapsed:.2f}s "
+            f"({total / max(elapsed, 1e-9):,.0f} rows/s)"
+        )
 
-        process_df["churn_prediction"] = preds
-        status_text.success(f"Analysis complete for {total} records!")
+    bulk_run = st.session_state.get("bulk_run")
+    if bulk_run is not None and bulk_run["file_id"] == file.file_id:
+        process_df = bulk_run["df"]
+        decision = bulk_run["decision"]
+        run = bulk_run["run"]
 
         # Results visualization
+        import plotly.express as px
+
         col1, col2 = st.columns([1, 1.5])
         
         with col1:
             st.subheader("Distribution")
-            chart = process_df["churn_prediction"].value_counts().reset_index()
+            chart = process_df["risk_band"].value_counts().reset_index()
             chart.columns = ["Risk Level", "Count"]
-            chart["Risk Level"] = chart["Risk Level"].map({0: "Low Risk", 1: "High Risk"})
+            chart["Risk Level"] = chart["Risk Level"].str.title() + " Risk"
             
             fig = px.pie(
                 chart, values="Count", names="Risk Level", 
                 hole=0.6,
                 color="Risk Level",
-                color_discrete_map={"Low Risk": "#22c55e", "High Risk": "#ef4444"}
+                color_discrete_map={"Low Risk": "#22c55e", "Medium Risk": "#eab308", "High Risk": "#ef4444"}
             )
             fig.update_layout(
                 paper_bgcolor='#ffffff',
@@ -120,23 +231,58 @@ if file is not None:
                 showlegend=True
             )
             st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"High risk from {decision['bands']['high']:.0%}, "
+                       f"medium from {decision['bands']['medium']:.0%}")
 
         with col2:
-            st.subheader("High Risk Segment")
-            high_risk = process_df[process_df["churn_prediction"] == 1]
-            st.dataframe(high_risk, use_container_width=True)
+            st.subheader("📞 Retention Call List")
+            scored = int(process_df["churn_probability"].notna().sum())
+            c1, c2 = st.columns(2)
+            k = int(c1.number_input("Top customers by churn probability", min_value=1,
+                                    max_value=max(scored, 1), value=min(TOP_K, max(scored, 1)), step=100))
+            page_size = c2.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+            ranked = call_list(run, process_df["churn_probability"].to_numpy(), k)
+            pages = max(1, -(-len(ranked) // page_size))
+            page = int(st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1))
+
+            # only the visible page is materialized, explained and sent to the browser
+            first = (page - 1) * page_size
+            visible = process_df.iloc[ranked[first:first + page_size]]
+            visible = visible.assign(rank=np.arange(first + 1, first + len(visible) + 1))
+            try:
+                visible = visible.assign(top_drivers=top_drivers(load_model(), visible))
+            except ValueError:
+                pass  # non-linear model: no closed-form drivers
+            st.dataframe(visible.set_index("rank"), use_container_width=True)
+
+            st.download_button(
+                f"📥 Export Top {len(ranked):,} Call List",
+                call_list_csv(run, process_df, k),
+                f"churn_call_list_top_{len(ranked)}.csv",
+                "text/csv",
+                use_container_width=True
+            )
 
         # Download
-        csv = process_df.to_csv(index=False).encode()
-        st.download_button(
-            "📥 Download Augmented Dataset",
-            csv,
-            "bulk_predictions.csv",
-            "text/csv",
-            use_container_width=True
-        )
+        # the full CSV is only serialized once the user asks for it
+        export_key = f"export_{run}"
+        if not st.session_state.get(export_key):
+            if st.button("📥 Prepare Augmented Dataset", use_container_width=True):
+                st.session_state[export_key] = True
+                st.rerun()
+        else:
+            with st.spinner("Preparing export..."):
+                csv = results_csv(run, process_df)
+            st.download_button(
+                "📥 Download Augmented Dataset",
+                csv,
+                "bulk_predictions.csv",
+                "text/csv",
+                use_container_width=True
+            )
 else:
-    st.info("Please upload a CSV or Excel file containing customer profiles to run bulk analysis.")
+    st.info("Please upload a CSV, Excel or .ccol file containing customer profiles to run bulk analysis.")
     st.markdown("""
     **Required Columns:**
     `age`, `gender`, `income_numeric`, `tenure`, `sub_plan`, `contract`, `monthly_charge`, `auto_renewal`, `late_payment`, `failed_transaction`
@@ -1,6 +1,9 @@
 import streamlit as st
 import plotly.graph_objects as go
 
+from schema import FEATURE_LABELS
+from threshold import DEFAULT_DECISION, risk_band
+
 st.set_page_config(layout="wide")
 
 st.title("Prediction Result Dashboard")
@@ -13,11 +16,16 @@ if "prediction" not in st.session_state or "probability" not in st.session_state
 # ----- Get values -----
 pred = st.session_state["prediction"]
 prob = st.session_state["probability"]
+drivers = st.session_state.get("explanation", [])
+decision = st.session_state.get("decision", DEFAULT_DECISION)
+band = st.session_state.get("risk_band") or risk_band(prob, decision)
+medium, high = decision["bands"]["medium"] * 100, decision["bands"]["high"] * 100
 
 # ----- KPI -----
-c1, c2 = st.columns(2)
+c1, c2, c3 = st.columns(3)
 c1.metric("Prediction Probability", f"{prob:.2f}")
-c2.metric("Churn Risk", "HIGH" if pred == 1 else "LOW")
+c2.metric("Churn Risk", band.upper())
+c3.metric("Action Threshold", f"{decision['threshold']:.2f}")
 
 # ----- Gauge Chart -----
 fig = go.Figure(go.Indicator(
@@ -27,19 +35,44 @@ fig = go.Figure(go.Indicator(
     gauge={
         'axis': {'range': [0, 100]},
         'steps': [
-            {'range': [0, 40], 'color': "green"},
-            {'range': [40, 70], 'color': "orange"},
-            {'range': [70, 100], 'color': "red"}
-        ]
+            {'range': [0, medium], 'color': "green"},
+            {'range': [medium, high], 'color': "orange"},
+            {'range': [high, 100], 'color': "red"}
+        ],
+        'threshold': {'line': {'color': "black", 'width': 4}, 'thickness': 0.75, 'value': high}
     }
 ))
 
 st.plotly_chart(fig, use_container_width=True)
 
+# ----- Risk Drivers -----
+if drivers:
+    st.subheader("What Drives This Prediction")
+    labels = [f"{FEATURE_LABELS.get(d['feature'], d['feature'])} = {d['value']}" for d in drivers]
+    contributions = [d["contribution"] for d in drivers]
+    fig = go.Figure(go.Bar(
+        x=contributions[::-1],
+        y=labels[::-1],
+        orientation="h",
+        marker_color=["#ef4444" if c > 0 else "#22c55e" for c in contributions[::-1]]
+    ))
+    fig.update_layout(xaxis_title="Contribution to churn log-odds", height=80 + 50 * len(drivers),
+                      margin=dict(l=20, r=20, t=20, b=40))
+    st.plotly_chart(fig, use_container_width=True)
+
 # ----- Recommendation -----
 st.subheader("Recommended Action")
 
-if pred == 1:
+raising = [d for d in drivers if d["contribution"] > 0]
+if pred == 1 and raising:
+    top = raising[0]
+    st.error(
+        f"High churn risk detected, driven mainly by {FEATURE_LABELS.get(top['feature'], top['feature']).lower()} "
+        f"({top['value']}). Target retention benefits at that factor."
+    )
+elif pred == 1:
     st.error("High churn risk detected. Offer retention benefits or targeted engagement.")
+elif band == "medium":
+    st.warning("Below the action threshold but on the watch list. Monitor engagement and re-score after changes.")
 else:
     st.success("Customer likely to stay. Maintain engagement and loyalty programs.")
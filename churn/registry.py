@@ -0,0 +1,299 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+
+from drift import DriftMonitor, load_profile, profile_path
+from fastpath import LinearScorer, scorer_path
+
+# Registry layout: one <version>.pkl (+ <version>.meta.json) per model in a
+# directory, plus a CURRENT file naming the version that serves traffic.
+# Without a registry directory the single CHURN_MODEL_PATH file is served and
+# its mtime/size is the version, as before.
+CURRENT = "CURRENT"
+SUFFIX = ".pkl"
+
+log = logging.getLogger("churn.registry")
+
+
+class UnknownModelVersion(LookupError):
+    pass
+
+
+def metadata_path(model_path):
+    return os.path.splitext(model_path)[0] + ".meta.json"
+
+
+def file_version(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def list_versions(root):
+    return sorted(f[:-len(SUFFIX)] for f in os.listdir(root) if f.endswith(SUFFIX))
+
+
+def read_current(root):
+    with open(os.path.join(root, CURRENT)) as f:
+        return f.read().strip()
+
+
+def promote(root, version):
+    # only a published name: a path such as "../x" must never reach CURRENT
+    if version not in list_versions(root):
+        raise ValueError(f"unknown model version {version!r}")
+    # write-then-rename so a watcher never reads a half-written CURRENT
+    tmp = os.path.join(root, f".{CURRENT}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(root, CURRENT))
+
+
+def publish(model_path, root, version=None, make_current=False):
+    os.makedirs(root, exist_ok=True)
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(root, version + SUFFIX)
+    if os.path.exists(target):
+        raise ValueError(f"model version {version!r} already exists")
+
+    shutil.copyfile(model_path, target + ".tmp")
+    os.replace(target + ".tmp", target)
+    for sidecar in (metadata_path, scorer_path, profile_path):
+        if os.path.exists(sidecar(model_path)):
+            shutil.copyfile(sidecar(model_path), sidecar(target))
+
+    if make_current:
+        promote(root, version)
+    return version
+
+
+class LoadedModel:
+    # The sklearn pipeline is unpickled on first use when a fast scorer was
+    # loaded from <model>.fast.json, so a worker can serve /predict before
+    # (or without ever) importing sklearn and pandas.
+
+    def __init__(self, version, path, model=None, meta=None, fast_scorer=None, drift=None):
+        self.version = version
+        self.path = path
+        self.meta = meta or {}
+        self.fast_scorer = fast_scorer
+        self.drift = drift
+        self.loaded_at = time.time()
+        self._model = model
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import joblib
+                    self._model = joblib.load(self.path)
+        return self._model
+
+    @property
+    def model(self):
+        return self.load()
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+
+class ModelRegistry:
+    # Holds the serving model plus any pinned versions. New versions are
+    # loaded on a watcher thread and swapped in with a single reference
+    # assignment, so requests never wait on joblib.load. A replaced version is
+    # only referenced by requests still using it and is freed once they return.
+
+    def __init__(self, root=None, model_path="churn_model.pkl", pinned=(),
+                 fast_path=False, check_s=2.0, drift_window=1000, on_swap=None):
+        self.root = root
+        self.model_path = model_path
+        self.pinned = [v for v in pinned if v]
+        self.fast_path = fast_path
+        self.check_s = check_s
+        self.drift_window = drift_window
+        self.on_swap = on_swap
+
+        self.current = None
+        self._loaded = {}
+        self._draining = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._watcher_pid = None
+        self.swaps = 0
+        self.load_failures = 0
+
+    # ---- loading ----
+    def _source_version(self):
+        if self.root is not None:
+            return read_current(self.root)
+        return file_version(self.model_path)
+
+    def _artifact(self, version):
+        if self.root is not None:
+            return os.path.join(self.root, version + SUFFIX)
+        return self.model_path
+
+    def _load(self, version):
+        path = self._artifact(version)
+
+        meta = {}
+        if os.path.exists(metadata_path(path)):
+            with open(metadata_path(path)) as f:
+                meta = json.load(f)
+
+        loaded = LoadedModel(version, path, meta=meta)
+        # each version is monitored against its own training profile
+        profile = load_profile(profile_path(path)) if self.drift_window > 0 else None
+        if profile is not None:
+            loaded.drift = DriftMonitor(profile, self.drift_window)
+        if self.fast_path:
+            loaded.fast_scorer = LinearScorer.load(scorer_path(path), path)
+            if loaded.fast_scorer is None:
+                try:
+                    loaded.fast_scorer = LinearScorer.from_pipeline(loaded.load())
+                except (AttributeError, ValueError) as e:
+                    log.warning("model %s has no fast path (%s); serving it through sklearn", version, e)
+        if loaded.fast_scorer is None:
+            loaded.load()
+        return loaded
+
+    def _swap(self, loaded):
+        with self._lock:
+            old = self.current
+            self._loaded[loaded.version] = loaded
+            self.current = loaded
+            if old is not None and old.version != loaded.version:
+                self.swaps += 1
+                if old.version not in self.pinned:
+                    del self._loaded[old.version]
+                    self._draining[old.version] = old
+        if self.on_swap is not None:
+            self.on_swap(loaded.version)
+        log.info("serving model version %s", loaded.version)
+
+    def load_initial(self):
+        self._swap(self._load(self._source_version()))
+        for version in self.pinned:
+            if version not in self._loaded:
+                self._loaded[version] = self._load(version)
+
+    def check(self):
+        # one watcher iteration: load and swap in the source's version if it changed
+        try:
+            version = self._source_version()
+        except OSError:
+            return False
+        if self.current is not None and version == self.current.version:
+            return False
+
+        loaded = self._loaded.get(version)
+        try:
+            loaded = loaded or self._load(version)
+            # on a swap the pipeline is always unpickled here, off the request path
+            loaded.load()
+        except Exception:
+            self.load_failures += 1
+            log.exception("failed to load model version %s; still serving %s",
+                          version, self.current and self.current.version)
+            return False
+        self._swap(loaded)
+        return True
+
+    # ---- watcher ----
+    def ensure_watcher(self):
+        # threads do not survive fork, so each (gunicorn) worker starts its own
+        if self._watcher_pid == os.getpid() or self.check_s <= 0:
+            return
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, daemon=True, name="model-watcher").start()
+
+    def warm(self):
+        # unpickle every held pipeline now rather than on the first request that needs one
+        for loaded in list(self._loaded.values()):
+            loaded.load()
+
+    def _watch(self):
+        self.warm()
+        while True:
+            self._wake.wait(self.check_s)
+            self._wake.clear()
+            self.check()
+
+    def wake(self):
+        self._wake.set()
+
+    # ---- lookup ----
+    def get(self, version=None):
+        if version is None:
+            return self.current
+        loaded = self._loaded.get(version)
+        if loaded is None:
+            raise UnknownModelVersion(f"model version {version!r} is not loaded "
+                              f"(loaded: {', '.join(sorted(self._loaded))})")
+        return loaded
+
+    def available(self):
+        if self.root is None:
+            return [self.current.version] if self.current is not None else []
+        return list_versions(self.root)
+
+    def stats(self):
+        return {
+            "current": self.current.version if self.current is not None else None,
+            "loaded": sorted(self._loaded),
+            "draining": sorted(self._draining.keys()),
+            "cold": sorted(v for v, m in self._loaded.items() if not m.is_loaded),
+            "swaps": self.swaps,
+            "load_failures": self.load_failures
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish and promote versioned churn models.")
+    parser.add_argument("--root", default=os.environ.get("CHURN_MODEL_DIR", "models"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("publish", help="copy a trained model (and its .meta.json) into the registry")
+    p.add_argument("model", help="path to a model .pkl written by train.py")
+    p.add_argument("--version", help="version name (default: UTC timestamp)")
+    p.add_argument("--promote", action="store_true", help="also make it the serving version")
+
+    p = sub.add_parser("promote", help="make an existing version the serving version")
+    p.add_argument("version")
+
+    sub.add_parser("list", help="list versions, marking the serving one")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        version = publish(args.model, args.root, args.version, args.promote)
+        print(f"Published {version}" + (" (serving)" if args.promote else ""))
+    elif args.command == "promote":
+        promote(args.root, args.version)
+        print(f"Serving {args.version}")
+    else:
+        try:
+            current = read_current(args.root)
+        except OSError:
+            current = None
+        for version in list_versions(args.root):
+            meta_file = metadata_path(os.path.join(args.root, version + SUFFIX))
+            winner = ""
+            if os.path.exists(meta_file):
+                with open(meta_file) as f:
+                    winner = json.load(f).get("model", "")
+            print(f"{'*' if version == current else ' '} {version:<24} {winner}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# raw customer columns the model is trained and served on; kept free of
+# heavy imports so the single-row API path can use them without pandas
+CATEGORICAL_COLUMNS = ["gender", "sub_plan", "contract"]
+NUMERIC_COLUMNS = [
+    "age",
+    "income_numeric",
+    "tenure",
+    "monthly_charge",
+    "auto_renewal",
+    "late_payment",
+    "failed_transaction"
+]
+FEATURE_COLUMNS = [
+    "age",
+    "gender",
+    "income_numeric",
+    "tenure",
+    "sub_plan",
+    "contract",
+    "monthly_charge",
+    "auto_renewal",
+    "late_payment",
+    "failed_transaction"
+]
+
+# display names for the features a prediction is explained by (explain.py)
+FEATURE_LABELS = {
+    "gender": "Gender",
+    "contract": "Contract type",
+    "sub_plan": "Subscription plan",
+    "income_numeric": "Income level",
+    "charge_per_tenure": "Monthly charge per tenure month",
+    "income_per_family": "Income level per tenure month"
+}
+
+
+def _number(value):
+    # the values pd.to_numeric accepts in validate_frame, without pandas
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str) and "_" not in value:
+        return float(value)
+    raise ValueError
+
+
+def validate_record(record):
+    # one customer object -> {column: clean value}, with the same rules and
+    # messages as scoring.validate_frame; raises ValueError when invalid
+    clean, problems = {}, []
+    for col in FEATURE_COLUMNS:
+        value = record.get(col)
+        if value is None or value != value:
+            problems.append(f"missing '{col}'")
+        elif col in CATEGORICAL_COLUMNS:
+            if isinstance(value, str):
+                clean[col] = value
+            else:
+                problems.append(f"invalid '{col}'")
+        else:
+            try:
+                clean[col] = _number(value)
+            except ValueError:
+                problems.append(f"invalid '{col}'")
+            else:
+                if clean[col] != clean[col]:
+                    problems.append(f"invalid '{col}'")
+    if problems:
+        raise ValueError("; ".join(problems))
+    return clean
@@ -0,0 +1,184 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import pandas as pd
+
+from columnar import is_columnar, iter_columnar
+from explain import driver_columns, explain_rows
+from scoring import score_rows
+from threshold import load_decision, risk_bands
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+_model = None
+_decision = None
+_explain = 0
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("Parquet input/output needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def is_parquet(path):
+    return path.lower().endswith(PARQUET_SUFFIXES)
+
+
+# ---------- INPUT ----------
+def iter_chunks(path, chunk_size):
+    if is_columnar(path):
+        yield from iter_columnar(path, chunk_size)
+    elif is_parquet(path):
+        pa = _require_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+# ---------- OUTPUT ----------
+class CsvSink:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        self.pa = _require_pyarrow()
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pa.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path):
+    return ParquetSink(path) if is_parquet(path) else CsvSink(path)
+
+
+# ---------- SCORING ----------
+def _init_worker(model_path, explain=0):
+    global _model, _decision, _explain
+    _model = joblib.load(model_path)
+    _decision = load_decision(model_path)
+    _explain = explain
+
+
+def score_chunk(chunk, first_row):
+    drivers = None
+    if _explain:
+        pred, prob, names, values = explain_rows(_model, chunk, _explain)
+        drivers = driver_columns(names, values)
+    else:
+        pred, prob = score_rows(_model, chunk)
+
+    if "customer_id" in chunk.columns:
+        ids = chunk["customer_id"].to_numpy()
+    else:
+        ids = range(first_row, first_row + len(chunk))
+
+    # the label comes from the model's tuned threshold (see threshold.py)
+    pred = pd.array(prob >= _decision["threshold"], dtype="boolean").astype("Int64")
+    pred[pd.isna(prob)] = pd.NA
+    out = pd.DataFrame({
+        "customer_id": ids,
+        "prediction": pred,
+        "probability": prob,
+        "risk_band": risk_bands(prob, _decision)
+    })
+    if drivers is not None:
+        out = pd.concat([out, drivers], axis=1)
+    return out
+
+
+def score_file(input_path, output_path, model_path="churn_model.pkl",
+               chunk_size=100_000, workers=1, progress=None, explain=0):
+    # at most 2 chunks per worker are in flight, so memory stays bounded by
+    # chunk_size regardless of the input size; results are written in order
+    sink = open_sink(output_path)
+    rows = 0
+    started = time.perf_counter()
+
+    def emit(out):
+        nonlocal rows
+        sink.write(out)
+        rows += len(out)
+        if progress:
+            progress(rows, time.perf_counter() - started)
+
+    try:
+        if workers <= 1:
+            _init_worker(model_path, explain)
+            for chunk in iter_chunks(input_path, chunk_size):
+                emit(score_chunk(chunk, rows))
+        else:
+            pending = deque()
+            submitted = 0
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(model_path, explain)) as pool:
+                for chunk in iter_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_chunk, chunk, submitted))
+                    submitted += len(chunk)
+                    while len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        sink.close()
+
+    return rows, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score a customer_data.csv-shaped CSV/Parquet/.ccol file in bounded memory."
+    )
+    parser.add_argument("input", help="input .csv, .parquet or .ccol file")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--model", default="churn_model.pkl")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"scoring processes (this machine has {os.cpu_count()} cores)")
+    parser.add_argument("--explain", type=int, default=0, metavar="K",
+                        help="add the top K risk drivers per customer (linear models only)")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    def progress(rows, elapsed):
+        print(f"\r{rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s)",
+              end="", file=sys.stderr, flush=True)
+
+    rows, elapsed = score_file(args.input, args.output, args.model,
+                               args.chunk_size, args.workers,
+                               None if args.quiet else progress, args.explain)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Scored {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from metrics import no_stage
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+
+def add_features(df):
+    # ---- prevent infinity ----
+    df["tenure"] = df["tenure"].clip(lower=1)
+
+    # ---- engineered features ----
+    # (float denominator: columnar files store tenure in narrow int types)
+    tenure_plus_one = df["tenure"].astype("float64") + 1
+    df["charge_per_tenure"] = df["monthly_charge"] / tenure_plus_one
+    df["income_per_family"] = df["income_numeric"] / tenure_plus_one
+    return df
+
+
+def records_to_frame(body):
+    # JSON array of customer objects, or columnar {"column": [values, ...]}
+    if isinstance(body, dict):
+        lengths = {len(v) for v in body.values() if isinstance(v, list)}
+        if len(lengths) != 1 or not all(isinstance(v, list) for v in body.values()):
+            raise ValueError("columnar body must map every column to a list of equal length")
+        return pd.DataFrame(body)
+    if isinstance(body, list):
+        bad = [i for i, row in enumerate(body) if not isinstance(row, dict)]
+        rows = [row if isinstance(row, dict) else {} for row in body]
+        df = pd.DataFrame(rows, columns=None if rows else FEATURE_COLUMNS)
+        df.attrs["non_object_rows"] = bad
+        return df
+    raise ValueError("body must be a JSON array of customers or a columnar object")
+
+
+def validate_frame(df):
+    # returns (clean frame of valid rows, {row position: error message})
+    n = len(df)
+    problems = [[] for _ in range(n)]
+
+    clean = pd.DataFrame(index=df.index)
+    for col in FEATURE_COLUMNS:
+        if col not in df.columns:
+            for p in problems:
+                p.append(f"missing '{col}'")
+            continue
+
+        raw = df[col]
+        missing = raw.isna().to_numpy()
+
+        if col in CATEGORICAL_COLUMNS:
+            bad = ~missing & ~raw.map(lambda v: isinstance(v, str)).to_numpy()
+            clean[col] = raw.astype(object)
+        else:
+            values = pd.to_numeric(raw, errors="coerce")
+            bad = ~missing & values.isna().to_numpy()
+            clean[col] = values
+
+        for i in np.flatnonzero(missing):
+            problems[i].append(f"missing '{col}'")
+        for i in np.flatnonzero(bad):
+            problems[i].append(f"invalid '{col}'")
+
+    for i in df.attrs.get("non_object_rows", []):
+        problems[i] = ["row is not a JSON object"]
+
+    errors = {i: "; ".join(p) for i, p in enumerate(problems) if p}
+    valid = np.ones(n, dtype=bool)
+    valid[list(errors)] = False
+    return clean[valid], errors
+
+
+def score_frame(model, df, stage=no_stage):
+    # one transformer pass: the label is derived from the probabilities;
+    # `stage` times the transform and predict steps for the metrics endpoint
+    X = df
+    with stage("transform"):
+        for _, step in getattr(model, "steps", [])[:-1]:
+            X = step.transform(X)
+    with stage("predict"):
+        classifier = model.steps[-1][1] if hasattr(model, "steps") else model
+        proba = classifier.predict_proba(X)
+    pred = model.classes_.take(proba.argmax(axis=1))
+    return pred, proba[:, 1]
+
+
+def score_batch(model, body, stage=no_stage, explain=0, monitor=None, decision=None):
+    # explain > 0 adds the top-`explain` risk drivers per row (see explain.py);
+    # monitor (a drift.DriftMonitor) sees every valid row and its probability;
+    # decision (see threshold.py) sets the labels and adds risk bands
+    with stage("frame"):
+        df = records_to_frame(body)
+        clean, errors = validate_frame(df)
+
+    n = len(df)
+    predictions = [None] * n
+    probabilities = [None] * n
+    explanations = [None] * n
+    bands = [None] * n
+
+    if len(clean):
+        # the monitor sees the validated raw columns, as /predict observes
+        # its validated record; add_features clips tenure in place
+        observed = clean[FEATURE_COLUMNS] if monitor is not None else None
+        with stage("features"):
+            clean = add_features(clean)
+        positions = [i for i in range(n) if i not in errors]
+        explainer = None
+        if explain:
+            from explain import explainer_for
+            try:
+                explainer = explainer_for(model)
+            except ValueError:
+                pass  # non-linear model: scored without drivers, explanations stay None
+        if explainer is not None:
+            with stage("predict"):
+                pred, prob, idx, values = explainer.score(clean, explain)
+                for pos, rec in zip(positions, explainer.records(clean, idx, values)):
+                    explanations[pos] = rec
+        else:
+            pred, prob = score_frame(model, clean, stage)
+        if decision is not None:
+            from threshold import risk_bands
+
+            pred = prob >= decision["threshold"]
+            for pos, band in zip(positions, risk_bands(prob, decision).tolist()):
+                bands[pos] = band
+        for pos, p, q in zip(positions, pred.tolist(), prob.tolist()):
+            predictions[pos] = int(p)
+            probabilities[pos] = float(q)
+        if monitor is not None:
+            monitor.observe_frame(observed, prob)
+
+    result = {
+        "count": n,
+        "scored": n - len(errors),
+        "predictions": predictions,
+        "probabilities": probabilities,
+        "errors": [{"index": i, "error": msg} for i, msg in sorted(errors.items())]
+    }
+    if decision is not None:
+        result["risk_bands"] = bands
+    if explain:
+        result["explanations"] = explanations
+    return result
+
+
+def score_rows(model, df):
+    # predictions and probabilities for every row of df; rows that fail
+    # validation come back as NaN so the caller can keep every row
+    df = df.reset_index(drop=True)
+    clean, errors = validate_frame(df)
+
+    pred = np.full(len(df), np.nan)
+    prob = np.full(len(df), np.nan)
+    if len(clean):
+        valid = clean.index.to_numpy()
+        pred[valid], prob[valid] = score_frame(model, add_features(clean))
+    return pred, prob
+
+
+def score_chunks(model, df, chunk_size=50_000):
+    # yields (start, stop, predictions, probabilities) per chunk
+    for start in range(0, len(df), chunk_size):
+        pred, prob = score_rows(model, df.iloc[start:start + chunk_size])
+        yield start, start + len(pred), pred, prob
@@ -0,0 +1,58 @@
+import argparse
+import gc
+import os
+
+from gunicorn.app.base import BaseApplication
+
+
+class ChurnServer(BaseApplication):
+    # Pre-forking gunicorn server: app.py (and churn_model.pkl) is imported
+    # once in the master with preload_app, then shared copy-on-write by
+    # every worker.
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app, registry
+        # unpickle every model here, once, so workers share it instead of each
+        # loading it lazily after the fork
+        registry.warm()
+        # keep the loaded model out of the collector so forked workers do not
+        # dirty its pages when a GC pass walks them
+        gc.freeze()
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the churn prediction API with gunicorn.")
+    parser.add_argument("--bind", default=os.environ.get("CHURN_BIND", "0.0.0.0:5000"))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("CHURN_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int,
+                        default=int(os.environ.get("CHURN_THREADS", 1)))
+    parser.add_argument("--timeout", type=int, default=30,
+                        help="seconds before a stuck worker is killed and restarted")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds in-flight requests get to finish on SIGTERM")
+    args = parser.parse_args(argv)
+
+    ChurnServer({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread" if args.threads > 1 else "sync",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "preload_app": True,
+        "accesslog": "-" if os.environ.get("CHURN_ACCESS_LOG") == "1" else None
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
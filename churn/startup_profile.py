@@ -0,0 +1,64 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def import_profile(module, env=None):
+    # import `module` in a fresh interpreter under -X importtime; returns the
+    # wall time and one (depth, name, self_us, cumulative_us) row per import
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, **(env or {})}, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return wall, rows
+
+
+def by_package(rows):
+    totals = defaultdict(int)
+    for _, name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda kv: -kv[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report where a module's cold import time goes.")
+    parser.add_argument("module", nargs="?", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="extra environment, e.g. CHURN_FAST_PATH=1")
+    args = parser.parse_args(argv)
+
+    wall, rows = import_profile(args.module, dict(kv.split("=", 1) for kv in args.env))
+    total_us = sum(r[2] for r in rows)
+
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall (interpreter start included), "
+          f"{total_us / 1000:.0f} ms in {len(rows)} imports")
+
+    print(f"\nTop {args.top} packages by self time:")
+    for package, us in by_package(rows)[:args.top]:
+        print(f"  {package:<36} {us / 1000:8.1f} ms  {us / max(total_us, 1):6.1%}")
+
+    target_depth = max((r[0] for r in rows if r[1] == args.module), default=1)
+    direct = [r for r in rows if r[0] == target_depth + 1]
+    print(f"\nImports made directly by {args.module} (cumulative):")
+    for _, name, _, cumulative_us in sorted(direct, key=lambda r: -r[3])[:args.top]:
+        print(f"  {name:<36} {cumulative_us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import logging
+import os
+
+from registry import metadata_path
+
+# The decision policy lives in the model's .meta.json under "decision":
+#     {"threshold": t, "bands": {"medium": m, "high": t}, ...}
+# A customer is predicted to churn when probability >= threshold. Risk bands
+# are low below m, medium from m, and high from the threshold. Models without
+# a tuned policy fall back to DEFAULT_DECISION.
+DEFAULT_DECISION = {"threshold": 0.5, "bands": {"medium": 0.3, "high": 0.5}}
+BANDS = ("low", "medium", "high")
+
+# retention economics: contacting a customer costs contact_cost; a lost
+# churner costs churn_cost; a contacted churner is kept with save_rate
+DEFAULT_COSTS = {"contact_cost": 10.0, "churn_cost": 100.0, "save_rate": 0.3}
+# the medium band starts where the watch list would catch this share of the
+# churners left below the action threshold
+WATCH_RECALL = 0.9
+# a tuned policy that leaves any band with less than this share of the
+# holdout (e.g. everyone flagged) is discarded for DEFAULT_DECISION
+MIN_BAND_SHARE = 0.01
+
+log = logging.getLogger("churn.threshold")
+
+
+# ---------- CURVE ----------
+def threshold_curve(y_true, y_prob, contact_cost=10.0, churn_cost=100.0, save_rate=0.3):
+    import numpy as np
+
+    # Metrics at every distinct probability threshold from sorted scores:
+    # the rows flagged at threshold t are those scoring >= t, so each count
+    # is a position in a sorted array. Scores and churner scores are sorted
+    # by value (np.sort is several times faster than argsort); each run of
+    # ties is one threshold. O(n log n), rows ordered by descending threshold.
+    # The first row is "contact nobody": a threshold just above the top score.
+    y_prob = np.asarray(y_prob, dtype=float)
+    y_true = np.asarray(y_true).astype(bool)
+    keep = np.isfinite(y_prob)
+    y_prob, y_true = y_prob[keep], y_true[keep]
+    n = len(y_prob)
+    if n == 0:
+        raise ValueError("no scored rows")
+
+    scores = np.sort(y_prob)
+    churner_scores = np.sort(y_prob[y_true])
+    first = np.flatnonzero(np.append(True, scores[1:] != scores[:-1]))[::-1]
+
+    thresholds = np.append(np.nextafter(scores[-1], np.inf), scores[first])
+    flagged = np.append(0, n - first)
+    positives = len(churner_scores)
+    tp = positives - np.searchsorted(churner_scores, thresholds, side="left")
+    fp = flagged - tp
+    base_rate = positives / n
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(flagged > 0, tp / np.maximum(flagged, 1), 0.0)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+        lift = precision / base_rate if base_rate else np.zeros(len(tp))
+    cost = flagged * contact_cost + (positives - tp * save_rate) * churn_cost
+
+    return {
+        "threshold": thresholds,
+        "flagged": flagged,
+        "tp": tp,
+        "fp": fp,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "lift": lift,
+        "flagged_rate": flagged / n,
+        "expected_cost": cost,
+        "rows": n,
+        "positives": positives,
+        # nobody contacted: every churner is lost
+        "baseline_cost": positives * churn_cost
+    }
+
+
+def best_index(curve, objective="cost"):
+    import numpy as np
+
+    if objective == "cost":
+        return int(np.argmin(curve["expected_cost"]))
+    if objective == "f1":
+        return int(np.argmax(curve["f1"]))
+    raise ValueError(f"unknown objective {objective!r} (use 'cost' or 'f1')")
+
+
+def choose_decision(curve, objective="cost", costs=None, watch_recall=WATCH_RECALL):
+    import numpy as np
+
+    # the metadata "decision" entry for the best threshold on `curve`
+    i = best_index(curve, objective)
+    threshold = float(curve["threshold"][i])
+    # the medium band is chosen on its own: the highest threshold that also
+    # catches watch_recall of the churners still below the action threshold.
+    # Recall only grows as the threshold falls, so that is the first crossing.
+    target = curve["recall"][i] + watch_recall * (1 - curve["recall"][i])
+    j = min(int(np.searchsorted(curve["recall"], target)), len(curve["recall"]) - 1)
+    medium = float(curve["threshold"][j])
+
+    # share of the holdout in each band: high, medium, low
+    high_rate = float(curve["flagged_rate"][i])
+    watch_rate = float(curve["flagged_rate"][j]) if medium < threshold else high_rate
+    shares = {"high": high_rate, "medium": watch_rate - high_rate, "low": 1 - watch_rate}
+    empty = [band for band in BANDS if shares[band] < MIN_BAND_SHARE]
+    if empty:
+        log.warning("tuned threshold %.4g leaves the %s band(s) with under %.0f%% of the holdout "
+                    "(flagged rate %.1f%%); using the default decision",
+                    threshold, "/".join(empty), MIN_BAND_SHARE * 100, high_rate * 100)
+        return {
+            **DEFAULT_DECISION,
+            "fallback": f"tuned threshold {threshold:.4g} left the {'/'.join(empty)} band(s) empty",
+            "objective": objective,
+            "costs": dict(costs or DEFAULT_COSTS),
+            "rows": curve["rows"]
+        }
+
+    return {
+        "threshold": threshold,
+        "bands": {"medium": medium, "high": threshold},
+        "objective": objective,
+        "costs": dict(costs or DEFAULT_COSTS),
+        "watch_recall": watch_recall,
+        "band_shares": shares,
+        "at_threshold": {
+            "precision": float(curve["precision"][i]),
+            "recall": float(curve["recall"][i]),
+            "f1": float(curve["f1"][i]),
+            "lift": float(curve["lift"][i]),
+            "flagged_rate": high_rate,
+            "expected_cost": float(curve["expected_cost"][i]),
+            "baseline_cost": float(curve["baseline_cost"])
+        },
+        "rows": curve["rows"]
+    }
+
+
+def tune(y_true, y_prob, objective="cost", costs=None, watch_recall=WATCH_RECALL):
+    costs = {**DEFAULT_COSTS, **(costs or {})}
+    return choose_decision(threshold_curve(y_true, y_prob, **costs), objective, costs, watch_recall)
+
+
+def sample_curve(curve, points=200):
+    import numpy as np
+
+    # evenly spaced rows of the curve (by flagged count) for tables and charts
+    n = len(curve["threshold"])
+    idx = np.unique(np.linspace(0, n - 1, min(points, n)).round().astype(int))
+    return {k: v[idx].tolist() for k, v in curve.items() if isinstance(v, np.ndarray)}
+
+
+# ---------- APPLYING A DECISION ----------
+def decision_of(meta):
+    return (meta or {}).get("decision") or DEFAULT_DECISION
+
+
+def risk_band(probability, decision):
+    bands = decision["bands"]
+    if probability >= bands["high"]:
+        return "high"
+    return "medium" if probability >= bands["medium"] else "low"
+
+
+def risk_bands(probabilities, decision):
+    import numpy as np
+
+    # vectorized risk_band; NaN (unscored) rows get None
+    probabilities = np.asarray(probabilities, dtype=float)
+    bands = decision["bands"]
+    idx = np.searchsorted([bands["medium"], bands["high"]], probabilities, side="right")
+    out = np.asarray(BANDS, dtype=object)[idx]
+    out[np.isnan(probabilities)] = None
+    return out
+
+
+def load_decision(model_path):
+    try:
+        with open(metadata_path(model_path)) as f:
+            return decision_of(json.load(f))
+    except (OSError, ValueError):
+        return DEFAULT_DECISION
+
+
+def write_decision(model_path, decision):
+    # merged into the existing metadata, which is created if the model has none
+    path = metadata_path(model_path)
+    meta = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            meta = json.load(f)
+    meta["decision"] = decision
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def main(argv=None):
+    import numpy as np
+    from columnar import read_table
+
+    parser = argparse.ArgumentParser(description="Tune the churn decision threshold on scored holdout data.")
+    parser.add_argument("--data", required=True, help="labelled holdout (.csv, .parquet or .ccol)")
+    parser.add_argument("--model", default="churn_model.pkl")
+    parser.add_argument("--scored", metavar="COLUMN",
+                        help="read probabilities from this column of --data instead of scoring it "
+                             "(e.g. churn_probability in a Bulk page download)")
+    parser.add_argument("--target", default="default")
+    parser.add_argument("--objective", choices=["cost", "f1"], default="cost")
+    parser.add_argument("--contact-cost", type=float, default=DEFAULT_COSTS["contact_cost"])
+    parser.add_argument("--churn-cost", type=float, default=DEFAULT_COSTS["churn_cost"])
+    parser.add_argument("--save-rate", type=float, default=DEFAULT_COSTS["save_rate"])
+    parser.add_argument("--watch-recall", type=float, default=WATCH_RECALL)
+    parser.add_argument("--write", action="store_true", help="store the decision in the model's .meta.json")
+    args = parser.parse_args(argv)
+
+    df = read_table(args.data)
+    df = df[df[args.target].notna()]
+    if args.scored:
+        probs = df[args.scored].to_numpy(dtype=float)
+    else:
+        import joblib
+        from scoring import score_chunks
+
+        model = joblib.load(args.model)
+        probs = np.full(len(df), np.nan)
+        for start, stop, _, prob in score_chunks(model, df):
+            probs[start:stop] = prob
+
+    costs = {"contact_cost": args.contact_cost, "churn_cost": args.churn_cost, "save_rate": args.save_rate}
+    curve = threshold_curve(df[args.target].to_numpy(), probs, **costs)
+    decision = choose_decision(curve, args.objective, costs, args.watch_recall)
+
+    print(f"{curve['rows']:,} rows, {curve['positives']:,} churners, "
+          f"{len(curve['threshold']):,} distinct thresholds")
+    print(f"{'threshold':>10} {'flagged':>8} {'precision':>9} {'recall':>7} {'lift':>6} {'cost':>14}")
+    sample = sample_curve(curve, 11)
+    for t, fr, p, r, lift, c in zip(sample["threshold"], sample["flagged_rate"], sample["precision"],
+                                    sample["recall"], sample["lift"], sample["expected_cost"]):
+        print(f"{t:>10.3f} {fr:>8.1%} {p:>9.3f} {r:>7.3f} {lift:>6.2f} {c:>14,.0f}")
+
+    if "fallback" in decision:
+        print(f"\nNo usable {args.objective} optimum: {decision['fallback']}; "
+              f"keeping the default threshold {decision['threshold']:.2f}")
+    else:
+        at = decision["at_threshold"]
+        print(f"\nBest by {args.objective}: threshold {decision['threshold']:.3f} "
+              f"(precision {at['precision']:.3f}, recall {at['recall']:.3f}, lift {at['lift']:.2f}, "
+              f"cost {at['expected_cost']:,.0f} vs {at['baseline_cost']:,.0f} with no contact)")
+    print(f"Risk bands: medium >= {decision['bands']['medium']:.3f}, high >= {decision['bands']['high']:.3f}")
+
+    if args.write:
+        write_decision(args.model, decision)
+        print(f"Wrote the decision to {metadata_path(args.model)}")
+
+
+if __name__ == "__main__":
+    main()
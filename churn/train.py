@@ -0,0 +1,392 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import (accuracy_score, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from columnar import read_table
+from drift import build_profile, profile_path, save_profile
+from fastpath import LinearScorer, scorer_path
+from registry import metadata_path
+from score_file import iter_chunks
+from scoring import FEATURE_COLUMNS, add_features
+from threshold import tune
+
+TARGET = "default"
+SEED = 42
+# incremental training tunes the decision and builds the drift profile from
+# an evenly strided sample of the holdout of at most this many rows
+HOLDOUT_SAMPLE = 200_000
+
+# same columns as the deployed churn_model.pkl: the remaining raw columns
+# pass through the ColumnTransformer's default remainder="drop"
+MODEL_CATEGORICAL = ["gender", "contract", "sub_plan"]
+MODEL_NUMERIC = ["income_numeric", "charge_per_tenure", "income_per_family"]
+
+CANDIDATES = {
+    "logistic_regression": (
+        LogisticRegression(max_iter=5000, class_weight="balanced", solver="liblinear"),
+        {"C": [0.01, 0.1, 1, 10, 50]}
+    ),
+    "decision_tree": (
+        DecisionTreeClassifier(min_samples_split=5, min_samples_leaf=2,
+                               class_weight="balanced", random_state=SEED),
+        {"max_depth": [10]}
+    ),
+    "random_forest": (
+        RandomForestClassifier(n_estimators=500, min_samples_split=5,
+                               class_weight="balanced", random_state=SEED),
+        {"max_depth": [15]}
+    ),
+    "gradient_boosting": (
+        GradientBoostingClassifier(n_estimators=300, random_state=SEED),
+        {}
+    )
+}
+
+SCORERS = {
+    "accuracy": lambda y, pred, prob: accuracy_score(y, pred),
+    "roc_auc": lambda y, pred, prob: roc_auc_score(y, prob),
+    "f1": lambda y, pred, prob: f1_score(y, pred)
+}
+
+
+def build_preprocessor(categories="auto"):
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(categories=categories, handle_unknown="ignore"), MODEL_CATEGORICAL),
+            ("num", StandardScaler(), MODEL_NUMERIC)
+        ]
+    )
+
+
+def load_training_data(path):
+    df = read_table(path).drop_duplicates()
+    X = add_features(df[FEATURE_COLUMNS].copy())
+    X = X.replace([np.inf, -np.inf], np.nan)
+    return X, df[TARGET].to_numpy()
+
+
+def fill_missing(X_train, X_test):
+    # medians and modes come from the training split only
+    for col in X_train.select_dtypes(include="number").columns:
+        median = X_train[col].median()
+        X_train[col] = X_train[col].fillna(median)
+        X_test[col] = X_test[col].fillna(median)
+    for col in MODEL_CATEGORICAL:
+        mode = X_train[col].mode()[0]
+        X_train[col] = X_train[col].fillna(mode)
+        X_test[col] = X_test[col].fillna(mode)
+    return X_train, X_test
+
+
+def _evaluate(classifier, X_train, y_train, X_val, y_val, scoring):
+    classifier.fit(X_train, y_train)
+    prob = classifier.predict_proba(X_val)[:, 1]
+    pred = classifier.predict(X_val)
+    return SCORERS[scoring](y_val, pred, prob)
+
+
+def search(X_train, y_train, candidates, scoring="accuracy", cv=5, n_jobs=-1):
+    # The preprocessor is fit once per fold and the transformed matrices are
+    # shared by every (candidate, params, fold) task, which run in parallel.
+    folds = []
+    for tr, va in StratifiedKFold(cv, shuffle=True, random_state=SEED).split(X_train, y_train):
+        pre = build_preprocessor().fit(X_train.iloc[tr])
+        folds.append((pre.transform(X_train.iloc[tr]), y_train[tr],
+                      pre.transform(X_train.iloc[va]), y_train[va]))
+
+    grid = [(name, params) for name in candidates
+            for params in ParameterGrid(CANDIDATES[name][1])]
+    tasks = [(name, params, fold) for name, params in grid for fold in folds]
+
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate)(clone(CANDIDATES[name][0]).set_params(**params), *fold, scoring)
+        for name, params, fold in tasks
+    )
+
+    results = []
+    for i, (name, params) in enumerate(grid):
+        fold_scores = scores[i * cv:(i + 1) * cv]
+        results.append({
+            "model": name,
+            "params": params,
+            "cv_mean": float(np.mean(fold_scores)),
+            "cv_std": float(np.std(fold_scores))
+        })
+    results.sort(key=lambda r: -r["cv_mean"])
+    return results
+
+
+def holdout_metrics(model, X_test, y_test):
+    prob = model.predict_proba(X_test)[:, 1]
+    pred = model.predict(X_test)
+    return {
+        "accuracy": float(accuracy_score(y_test, pred)),
+        "roc_auc": float(roc_auc_score(y_test, prob)),
+        "precision": float(precision_score(y_test, pred)),
+        "recall": float(recall_score(y_test, pred)),
+        "f1": float(f1_score(y_test, pred))
+    }
+
+
+def save_model(model, meta, output, profile=None):
+    joblib.dump(model, output)
+    with open(metadata_path(output), "w") as f:
+        json.dump(meta, f, indent=2)
+    if profile is not None:
+        save_profile(profile, profile_path(output))
+
+    # linear winners also get the pandas-free fast-path weights (see fastpath.py)
+    try:
+        LinearScorer.from_pipeline(model).save(scorer_path(output), output)
+    except (AttributeError, ValueError):
+        if os.path.exists(scorer_path(output)):
+            os.remove(scorer_path(output))
+
+
+def train(data_path, output, candidates=tuple(CANDIDATES), scoring="accuracy", cv=5, n_jobs=-1):
+    started = time.perf_counter()
+
+    X, y = load_training_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=SEED, stratify=y
+    )
+    X_train, X_test = fill_missing(X_train.copy(), X_test.copy())
+
+    results = search(X_train, y_train, candidates, scoring, cv, n_jobs)
+    best = results[0]
+
+    classifier = clone(CANDIDATES[best["model"]][0]).set_params(**best["params"])
+    model = Pipeline(steps=[
+        ("preprocessor", build_preprocessor()),
+        ("classifier", classifier)
+    ])
+    model.fit(X_train, y_train)
+
+    meta = {
+        "model": best["model"],
+        "params": best["params"],
+        "scoring": scoring,
+        "cv_mean": best["cv_mean"],
+        "cv_std": best["cv_std"],
+        "holdout": holdout_metrics(model, X_test, y_test),
+        # operating threshold and risk bands tuned on the holdout (see threshold.py)
+        "decision": tune(y_test, model.predict_proba(X_test)[:, 1]),
+        "search": results,
+        "data": os.path.basename(data_path),
+        "rows": int(len(X)),
+        "sklearn_version": sklearn.__version__,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "train_seconds": round(time.perf_counter() - started, 2)
+    }
+    # reference distributions for the API's drift monitor (see drift.py)
+    profile = build_profile(X_train, model.predict_proba(X_train)[:, 1])
+    save_model(model, meta, output, profile)
+    return model, meta
+
+
+# ---------- INCREMENTAL (OUT-OF-CORE) TRAINING ----------
+def _prepare_chunk(chunk, first_row, holdout_every):
+    chunk = chunk[chunk[TARGET].notna()]
+    X = add_features(chunk[FEATURE_COLUMNS].copy()).replace([np.inf, -np.inf], np.nan)
+    y = chunk[TARGET].to_numpy().astype(int)
+    # deterministic holdout: every n-th row of the file by position
+    holdout = (first_row + np.arange(len(chunk))) % holdout_every == 0
+    return X, y, holdout
+
+
+def _iter_prepared(data_path, chunk_size, holdout_every):
+    rows = 0
+    for chunk in iter_chunks(data_path, chunk_size):
+        yield _prepare_chunk(chunk, rows, holdout_every)
+        rows += len(chunk)
+
+
+def _transform(preprocessor, X):
+    # missing numerics land on the training mean (0 after scaling); missing or
+    # unseen categories are all-zero one-hot rows
+    return np.nan_to_num(preprocessor.transform(X), nan=0.0)
+
+
+def _streaming_auc(pos_hist, neg_hist):
+    # ROC AUC from fixed-bin probability histograms: constant memory
+    pos, neg = pos_hist[::-1], neg_hist[::-1]
+    tp = np.concatenate([[0], np.cumsum(pos)])
+    fp = np.concatenate([[0], np.cumsum(neg)])
+    if tp[-1] == 0 or fp[-1] == 0:
+        return float("nan")
+    return float(np.trapezoid(tp / tp[-1], fp / fp[-1]))
+
+
+def train_incremental(data_path, output, chunk_size=200_000, epochs=3, alpha=1e-4,
+                      holdout_every=10, progress=None):
+    started = time.perf_counter()
+
+    def report(stage, rows):
+        if progress:
+            progress(stage, rows, time.perf_counter() - started)
+
+    # pass 1: category vocabulary, scaler statistics and class counts
+    vocab = {col: set() for col in MODEL_CATEGORICAL}
+    scaler = StandardScaler()
+    class_counts = np.zeros(2, dtype=np.int64)
+    rows = 0
+    for X, y, holdout in _iter_prepared(data_path, chunk_size, holdout_every):
+        train_rows = ~holdout
+        for col in MODEL_CATEGORICAL:
+            vocab[col].update(X[col].dropna().unique().tolist())
+        if train_rows.any():
+            scaler.partial_fit(X.loc[train_rows, MODEL_NUMERIC])
+        class_counts += np.bincount(y[train_rows], minlength=2)[:2]
+        rows += len(y)
+        report("profile", rows)
+
+    if rows == 0 or class_counts.min() == 0:
+        raise ValueError("training data must contain both churned and retained customers")
+
+    preprocessor = None
+    class_weight = {c: class_counts.sum() / (2.0 * n) for c, n in enumerate(class_counts)}
+    # averaged SGD converges to a logistic-regression-quality solution in a
+    # few passes instead of tracking the noise of the last chunk
+    classifier = SGDClassifier(loss="log_loss", alpha=alpha, class_weight=class_weight,
+                               average=True, random_state=SEED)
+
+    # passes 2..: partial_fit one chunk at a time
+    for epoch in range(epochs):
+        rows = 0
+        for X, y, holdout in _iter_prepared(data_path, chunk_size, holdout_every):
+            if preprocessor is None:
+                preprocessor = build_preprocessor(
+                    categories=[sorted(vocab[col]) for col in MODEL_CATEGORICAL]
+                ).fit(X)
+                # swap in the scaler fitted over the whole file in pass 1
+                preprocessor.transformers_ = [
+                    (name, scaler if name == "num" else t, cols)
+                    for name, t, cols in preprocessor.transformers_
+                ]
+            train_rows = ~holdout
+            if train_rows.any():
+                classifier.partial_fit(_transform(preprocessor, X[train_rows]), y[train_rows],
+                                       classes=[0, 1])
+            rows += len(y)
+            report(f"epoch {epoch + 1}/{epochs}", rows)
+
+    model = Pipeline(steps=[("preprocessor", preprocessor), ("classifier", classifier)])
+
+    # final pass: holdout metrics with constant-memory accumulators
+    bins = 1000
+    pos_hist = np.zeros(bins, dtype=np.int64)
+    neg_hist = np.zeros(bins, dtype=np.int64)
+    tp = fp = fn = n = 0
+    log_loss_sum = 0.0
+    stride = max(1, -(-rows // (holdout_every * HOLDOUT_SAMPLE)))
+    sample_X, sample_y, sample_prob = [], [], []
+    for X, y, holdout in _iter_prepared(data_path, chunk_size, holdout_every):
+        if not holdout.any():
+            continue
+        y_h = y[holdout]
+        prob = classifier.predict_proba(_transform(preprocessor, X[holdout]))[:, 1]
+        keep = (n + np.arange(len(y_h))) % stride == 0
+        sample_X.append(X[holdout][keep])
+        sample_y.append(y_h[keep])
+        sample_prob.append(prob[keep])
+        pred = (prob > 0.5).astype(int)
+
+        idx = np.minimum((prob * bins).astype(int), bins - 1)
+        pos_hist += np.bincount(idx[y_h == 1], minlength=bins)
+        neg_hist += np.bincount(idx[y_h == 0], minlength=bins)
+        tp += int(((pred == 1) & (y_h == 1)).sum())
+        fp += int(((pred == 1) & (y_h == 0)).sum())
+        fn += int(((pred == 0) & (y_h == 1)).sum())
+        n += len(y_h)
+        p = np.clip(prob, 1e-15, 1 - 1e-15)
+        log_loss_sum += float(-(y_h * np.log(p) + (1 - y_h) * np.log(1 - p)).sum())
+    tn = n - tp - fp - fn
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    meta = {
+        "model": "sgd_logistic_incremental",
+        "params": {"alpha": alpha, "epochs": epochs, "chunk_size": chunk_size},
+        "holdout": {
+            "accuracy": (tp + tn) / n if n else float("nan"),
+            "roc_auc": _streaming_auc(pos_hist, neg_hist),
+            "log_loss": log_loss_sum / n if n else float("nan"),
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        },
+        "holdout_every": holdout_every,
+        # operating threshold and risk bands tuned on the holdout sample (see threshold.py)
+        "decision": tune(np.concatenate(sample_y), np.concatenate(sample_prob)) if n else None,
+        "data": os.path.basename(data_path),
+        "rows": int(rows),
+        "sklearn_version": sklearn.__version__,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "train_seconds": round(time.perf_counter() - started, 2)
+    }
+    # the holdout sample stands in for the training rows as the drift
+    # reference: both are drawn from the same file
+    profile = build_profile(pd.concat(sample_X), np.concatenate(sample_prob)) if n else None
+    save_model(model, meta, output, profile)
+    return model, meta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the churn model and write it with its metrics.")
+    parser.add_argument("--data", default="customer_churn_prevention system.csv",
+                        help=".csv, .parquet or .ccol file")
+    parser.add_argument("--output", default="churn_model.pkl")
+    parser.add_argument("--models", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--scoring", choices=list(SCORERS), default="accuracy")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel jobs (-1 = all cores)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stream the CSV/Parquet file in chunks and train a linear model with partial_fit")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--alpha", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+
+    if args.incremental:
+        def progress(stage, rows, elapsed):
+            print(f"\r{stage}: {rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s overall)",
+                  end="", file=sys.stderr, flush=True)
+
+        _, meta = train_incremental(args.data, args.output, args.chunk_size, args.epochs,
+                                    args.alpha, progress=progress)
+        print(file=sys.stderr)
+        print("Holdout: " + ", ".join(f"{k}={v:.4f}" for k, v in meta["holdout"].items()))
+        print(f"Wrote {args.output} and {metadata_path(args.output)} in {meta['train_seconds']}s")
+        return
+
+    _, meta = train(args.data, args.output, args.models, args.scoring, args.cv, args.jobs)
+
+    for r in meta["search"]:
+        print(f"{r['model']:<20} {json.dumps(r['params']):<14} "
+              f"{args.scoring}={r['cv_mean']:.4f} (+/- {r['cv_std']:.4f})")
+    print(f"\nBest: {meta['model']} {meta['params']}")
+    print("Holdout: " + ", ".join(f"{k}={v:.4f}" for k, v in meta["holdout"].items()))
+    print(f"Wrote {args.output} and {metadata_path(args.output)} in {meta['train_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from metrics import no_stage
+from scoring import add_features, records_to_frame, score_frame, validate_frame
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from threshold import risk_band
+
+# What-if sweep: every combination of the requested lever values applied to
+# one customer, scored with a single predict_proba call. The grid is built
+# column-wise from index arrays (no per-variant Python loop), so thousands
+# of variants cost about as much as one small batch.
+MAX_VARIANTS = 20_000
+# a variant must lower the churn probability by at least this much to count
+MIN_GAIN = 0.01
+# effort of changing one non-price lever, in monthly-charge dollars
+LEVER_COST = 10.0
+
+
+def build_grid(customer, grid):
+    # grid: {feature: [values, ...]} -> (frame of every combination in
+    # C order over the grid's keys, shape)
+    if not isinstance(grid, dict) or not grid:
+        raise ValueError("the what-if grid must map at least one feature to a list of values")
+    levers = list(grid)
+    unknown = [k for k in levers if k not in FEATURE_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown what-if features: {', '.join(unknown)}")
+    # a bare string would otherwise be swept character by character
+    bad = [k for k in levers if not isinstance(grid[k], list) or not grid[k]]
+    if bad:
+        raise ValueError(f"what-if values must be non-empty lists: {', '.join(bad)}")
+    values = [grid[k] for k in levers]
+    shape = tuple(len(v) for v in values)
+    n = int(np.prod(shape))
+    if n > MAX_VARIANTS:
+        raise ValueError(f"{n:,} variants requested; the limit is {MAX_VARIANTS:,}")
+
+    codes = np.indices(shape).reshape(len(shape), -1)
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in grid:
+            options = values[levers.index(col)]
+            if col in CATEGORICAL_COLUMNS:
+                options = np.asarray(options, dtype=object)
+            else:
+                options = pd.to_numeric(pd.Series(options, dtype=object), errors="coerce").to_numpy(dtype=float)
+                if np.isnan(options).any():
+                    raise ValueError(f"invalid '{col}' value in the what-if grid")
+            columns[col] = options[codes[levers.index(col)]]
+        else:
+            columns[col] = np.full(n, customer.get(col), dtype=object)
+    return pd.DataFrame(columns), shape
+
+
+def cheapest_change(customer, frame, levers, probabilities, baseline, threshold):
+    # The lowest-cost variant that lowers risk by at least MIN_GAIN: a price
+    # cut costs the discount, any other changed lever costs LEVER_COST. When
+    # the customer is over the action threshold, variants that bring them
+    # under it are preferred. Ties go to the lower probability.
+    gain = baseline - probabilities
+    candidates = gain >= MIN_GAIN
+    if baseline >= threshold and (candidates & (probabilities < threshold)).any():
+        candidates &= probabilities < threshold
+    if not candidates.any():
+        return None
+
+    cost = np.zeros(len(frame))
+    changed = {}
+    for col in levers:
+        values = frame[col].to_numpy()
+        if col in CATEGORICAL_COLUMNS:
+            changed[col] = values.astype(str) != str(customer[col])
+        else:
+            current = float(customer[col])
+            changed[col] = ~np.isclose(values.astype(float), current)
+        if col == "monthly_charge":
+            cost += np.clip(current - values.astype(float), 0, None)
+        else:
+            cost += LEVER_COST * changed[col]
+
+    cost[~candidates] = np.inf
+    best = int(np.lexsort((probabilities, cost))[0])
+    return {
+        "index": best,
+        "changes": {col: _json_value(frame[col].iat[best]) for col, mask in changed.items() if mask[best]},
+        "probability": float(probabilities[best]),
+        "reduction": float(gain[best]),
+        "cost": float(cost[best])
+    }
+
+
+def _json_value(v):
+    v = v.item() if hasattr(v, "item") else v
+    return int(v) if isinstance(v, float) and v.is_integer() else v
+
+
+def sweep(model, customer, grid, decision, stage=no_stage):
+    # scores the baseline customer and every variant in one model call
+    with stage("frame"):
+        base, errors = validate_frame(records_to_frame([customer]))
+        if errors:
+            raise ValueError(errors[0])
+        frame, shape = build_grid(customer, grid)
+        both = pd.concat([frame, base], ignore_index=True)
+        clean, errors = validate_frame(both)
+        if errors:
+            raise ValueError(f"invalid what-if value: {next(iter(errors.values()))}")
+    with stage("features"):
+        clean = add_features(clean)
+    _, prob = score_frame(model, clean, stage)
+    probabilities, baseline = prob[:-1], float(prob[-1])
+
+    best = cheapest_change(customer, frame, list(grid), probabilities, baseline, decision["threshold"])
+    if best is not None:
+        best["risk_band"] = risk_band(best["probability"], decision)
+    return {
+        "levers": list(grid),
+        "values": {k: [_json_value(v) for v in grid[k]] for k in grid},
+        "shape": list(shape),
+        "probabilities": probabilities.tolist(),
+        "baseline": {"probability": baseline, "risk_band": risk_band(baseline, decision)},
+        "threshold": decision["threshold"],
+        "best": best
+    }